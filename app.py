@@ -3,16 +3,138 @@ Streamlit Web UI for Floor Plan to 3D House Generator
 """
 
 import streamlit as st
+import cv2
 import os
-import tempfile
 from floor_plan_to_3d import FloorPlanTo3D
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.colors import to_rgba
 from mpl_toolkits.mplot3d import Axes3D
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-from PIL import Image
 import io
 import numpy as np
 
+# Let OpenCV use every core for its internal parallel loops
+cv2.setNumThreads(os.cpu_count() or 1)
+
+
+@st.cache_data(show_spinner=False)
+def _detect(img_bytes: bytes, _image: np.ndarray):
+    """Detect walls in the decoded image (cached on the original image bytes)"""
+    return FloorPlanTo3D().detect_walls_from_array(_image), _image.shape[:2]
+
+
+@st.cache_data(show_spinner=False)
+def _normalize(walls, image_shape):
+    """Normalize wall coordinates to real-world scale"""
+    return FloorPlanTo3D().normalize_coordinates(walls, image_shape)
+
+
+@st.cache_data(show_spinner=False)
+def _build_mesh(normalized_walls, scale, image_shape, wall_height, wall_thickness):
+    """Build one triangle mesh for floor + walls; the first two triangles are the floor"""
+    converter = FloorPlanTo3D(wall_height=wall_height, wall_thickness=wall_thickness)
+    floor = converter.create_3d_floor(image_shape, scale)
+    wall_verts, wall_tris = converter.create_3d_wall_mesh(normalized_walls, wall_height, wall_thickness)
+    verts = np.concatenate([floor, wall_verts]).astype(np.float32, copy=False)
+    tris = np.concatenate([[[0, 1, 2], [0, 2, 3]], wall_tris + len(floor)])
+    return verts, tris
+
+
+def _plotly_figure(normalized_walls, scale, image_shape, wall_height, wall_thickness):
+    """Build an interactive WebGL figure of the model (requires plotly)"""
+    import plotly.graph_objects as go
+    
+    verts, tris = _build_mesh(normalized_walls, scale, image_shape, wall_height, wall_thickness)
+    x, y, z = verts.T
+    floor_tris, wall_tris = tris[:2], tris[2:]
+    
+    fig = go.Figure([
+        go.Mesh3d(x=x, y=y, z=z, i=floor_tris[:, 0], j=floor_tris[:, 1], k=floor_tris[:, 2],
+                  color='gray', opacity=0.3, name='Floor'),
+        go.Mesh3d(x=x, y=y, z=z, i=wall_tris[:, 0], j=wall_tris[:, 1], k=wall_tris[:, 2],
+                  color='beige', opacity=0.7, name='Walls'),
+    ])
+    fig.update_layout(
+        title='3D House Model from Floor Plan',
+        scene=dict(xaxis_title='X (meters)', yaxis_title='Y (meters)',
+                   zaxis_title='Z (meters)', aspectmode='data'),
+        margin=dict(l=0, r=0, t=40, b=0),
+    )
+    return fig
+
+
+# st.image re-encodes anything that is not already a JPEG/PNG at most this wide
+_MAX_IMAGE_WIDTH = 1460
+
+
+@st.cache_data(show_spinner=False)
+def _encode_preview(img_bytes, _image, quality=80) -> bytes:
+    """Encode the decoded upload once as a display-sized JPEG that st.image passes through as-is"""
+    h, w = _image.shape[:2]
+    if w > _MAX_IMAGE_WIDTH:
+        _image = cv2.resize(_image, (_MAX_IMAGE_WIDTH, round(h * _MAX_IMAGE_WIDTH / w)),
+                            interpolation=cv2.INTER_AREA)
+    return cv2.imencode('.jpg', _image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+def _get_figure():
+    """Return this session's figure and 3D axes, created on first use"""
+    if 'fig' not in st.session_state:
+        fig = Figure(figsize=(12, 10))
+        # Fixed margins instead of bbox_inches='tight', which renders every save twice
+        fig.subplots_adjust(left=0.02, right=0.98, top=0.95, bottom=0.02)
+        st.session_state['fig'] = fig
+        st.session_state['ax'] = fig.add_subplot(111, projection='3d')
+    return st.session_state['fig'], st.session_state['ax']
+
+
+# Fast encoder settings: lowest zlib level for the PNG download, lossy JPEG for the preview
+_PIL_KWARGS = {
+    'png': {'compress_level': 1},
+    'jpeg': {'quality': 85},
+}
+
+
+@st.cache_data(show_spinner=False)
+def _render(normalized_walls, scale, image_shape, wall_height, wall_thickness, dpi=72, fmt='png',
+            _figure=None) -> bytes:
+    """Render the 3D model into the session figure and return it as PNG or JPEG bytes"""
+    fig, ax = _figure if _figure is not None else _get_figure()
+    ax.cla()
+    
+    # One triangle mesh for floor + walls
+    verts, tris = _build_mesh(normalized_walls, scale, image_shape, wall_height, wall_thickness)
+    colors = np.array([to_rgba('gray', 0.3)] * 2 + [to_rgba('beige', 0.7)] * (len(tris) - 2))
+    
+    surf = ax.plot_trisurf(verts[:, 0], verts[:, 1], verts[:, 2], triangles=tris,
+                           shade=False, linewidth=0)
+    surf.set_facecolor(colors)
+    
+    # Set axis properties
+    ax.set_xlabel('X (meters)', fontsize=10)
+    ax.set_ylabel('Y (meters)', fontsize=10)
+    ax.set_zlabel('Z (meters)', fontsize=10)
+    ax.set_title('3D House Model from Floor Plan', fontsize=14, fontweight='bold')
+    
+    # Set equal aspect ratio from the data extents (floor + wall endpoints)
+    walls_arr = np.asarray(normalized_walls, dtype=np.float32).reshape(-1, 4)
+    floor = verts[:4]
+    xs = np.concatenate([floor[:, 0], walls_arr[:, 0], walls_arr[:, 2]])
+    ys = np.concatenate([floor[:, 1], walls_arr[:, 1], walls_arr[:, 3]])
+    xmin, xmax = xs.min(), xs.max()
+    ymin, ymax = ys.min(), ys.max()
+    zmin, zmax = 0.0, wall_height
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+    ax.set_zlim(zmin, zmax)
+    ax.set_box_aspect((xmax - xmin, ymax - ymin, zmax - zmin))
+    
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=dpi, pil_kwargs=_PIL_KWARGS[fmt])
+    return buf.getvalue()
+
+
 # Page configuration
 st.set_page_config(
     page_title="Floor Plan to 3D House Generator",
@@ -30,7 +152,7 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .stButton>button {
+    .stButton>button, .stFormSubmitButton>button {
         width: 100%;
         background-color: #1f77b4;
         color: white;
@@ -38,7 +160,7 @@ st.markdown("""
         padding: 0.5rem 1rem;
         border-radius: 0.5rem;
     }
-    .stButton>button:hover {
+    .stButton>button:hover, .stFormSubmitButton>button:hover {
         background-color: #1565a0;
     }
     </style>
@@ -52,22 +174,33 @@ st.markdown("---")
 with st.sidebar:
     st.header("⚙️ Settings")
     
-    wall_height = st.slider(
-        "Wall Height (meters)",
-        min_value=2.0,
-        max_value=5.0,
-        value=3.0,
-        step=0.1,
-        help="Height of the walls in the 3D model"
-    )
+    # Widgets inside the form only trigger a rerun on submit
+    with st.form("generate"):
+        wall_height = st.slider(
+            "Wall Height (meters)",
+            min_value=2.0,
+            max_value=5.0,
+            value=3.0,
+            step=0.1,
+            help="Height of the walls in the 3D model"
+        )
+        
+        wall_thickness = st.slider(
+            "Wall Thickness (meters)",
+            min_value=0.1,
+            max_value=0.5,
+            value=0.2,
+            step=0.05,
+            help="Thickness of the walls in the 3D model"
+        )
+        
+        submitted = st.form_submit_button("🚀 Generate 3D Model", type="primary")
     
-    wall_thickness = st.slider(
-        "Wall Thickness (meters)",
-        min_value=0.1,
-        max_value=0.5,
-        value=0.2,
-        step=0.05,
-        help="Thickness of the walls in the 3D model"
+    renderer = st.radio(
+        "Renderer",
+        ["Matplotlib", "Plotly (GPU)"],
+        horizontal=True,
+        help="Plotly renders an interactive model in the browser using WebGL"
     )
     
     st.markdown("---")
@@ -97,96 +230,76 @@ with col1:
     )
     
     if uploaded_file is not None:
-        # Display uploaded image
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Uploaded Floor Plan", use_container_width=True)
+        # Decode the upload once in memory; reused for display and detection
+        img_bytes = uploaded_file.getvalue()
+        image = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            st.error("❌ Could not decode the uploaded image.")
+            st.stop()
         
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_file:
-            image.save(tmp_file.name)
-            temp_path = tmp_file.name
+        # Display uploaded image
+        st.image(_encode_preview(img_bytes, image), caption="Uploaded Floor Plan", use_container_width=True)
         
-        # Generate button
-        if st.button("🚀 Generate 3D Model", type="primary"):
+        # Heavy work only runs on explicit form submit
+        if submitted:
             with st.spinner("Generating 3D model... This may take a moment."):
                 try:
-                    # Create converter
-                    converter = FloorPlanTo3D(
-                        wall_height=wall_height,
-                        wall_thickness=wall_thickness
-                    )
-                    
-                    # Load and process floor plan
-                    image = converter.load_floor_plan(temp_path)
-                    walls = converter.detect_walls(image)
-                    normalized_walls, scale = converter.normalize_coordinates(walls, image.shape)
-                    
-                    # Create 3D visualization directly
-                    fig = plt.figure(figsize=(12, 10))
-                    ax = fig.add_subplot(111, projection='3d')
-                    
-                    # Create floor
-                    floor = converter.create_3d_floor(image.shape, scale)
-                    floor_face = Poly3DCollection([floor], alpha=0.3, facecolor='gray', edgecolor='black')
-                    ax.add_collection3d(floor_face)
-                    
-                    # Create walls
-                    for x1, y1, x2, y2 in normalized_walls:
-                        wall_faces = converter.create_3d_wall(x1, y1, x2, y2, wall_height, wall_thickness)
-                        for face in wall_faces:
-                            wall_poly = Poly3DCollection([face], alpha=0.7, facecolor='beige', 
-                                                        edgecolor='brown', linewidths=0.5)
-                            ax.add_collection3d(wall_poly)
+                    # Load and process floor plan (cached on image bytes)
+                    walls, image_shape = _detect(img_bytes, image)
+                    normalized_walls, scale = _normalize(walls, image_shape)
                     
-                    # Set axis properties
-                    ax.set_xlabel('X (meters)', fontsize=10)
-                    ax.set_ylabel('Y (meters)', fontsize=10)
-                    ax.set_zlabel('Z (meters)', fontsize=10)
-                    ax.set_title('3D House Model from Floor Plan', fontsize=14, fontweight='bold')
+                    # Collapse collinear fragments before extrusion
+                    normalized_walls = FloorPlanTo3D().merge_walls(normalized_walls, wall_thickness)
                     
-                    # Set equal aspect ratio
-                    max_range = max([ax.get_xlim()[1] - ax.get_xlim()[0],
-                                    ax.get_ylim()[1] - ax.get_ylim()[0],
-                                    ax.get_zlim()[1] - ax.get_zlim()[0]])
-                    mid_x = (ax.get_xlim()[0] + ax.get_xlim()[1]) / 2
-                    mid_y = (ax.get_ylim()[0] + ax.get_ylim()[1]) / 2
-                    mid_z = (ax.get_zlim()[0] + ax.get_zlim()[1]) / 2
-                    ax.set_xlim(mid_x - max_range/2, mid_x + max_range/2)
-                    ax.set_ylim(mid_y - max_range/2, mid_y + max_range/2)
-                    ax.set_zlim(mid_z - max_range/2, mid_z + max_range/2)
+                    # Keep the model inputs so the result survives later reruns
+                    st.session_state['model'] = (normalized_walls, scale, image_shape, wall_height, wall_thickness)
+                    st.session_state['model_source'] = (uploaded_file.name, uploaded_file.size)
+                    st.session_state['download_ready'] = False
                     
-                    # Display result directly on screen
-                    with col2:
-                        st.header("🎨 3D Model Result")
-                        st.pyplot(fig, use_container_width=True)
-                        
-                        # Save to buffer for download
-                        buf = io.BytesIO()
-                        fig.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-                        buf.seek(0)
-                        
-                        # Download button
-                        st.download_button(
-                            label="📥 Download 3D Model",
-                            data=buf,
-                            file_name="3d_house_model.png",
-                            mime="image/png"
-                        )
-                    
-                    plt.close(fig)
-                    
-                    # Clean up temp files
-                    os.unlink(temp_path)
-                    
-                    st.success(f"✅ 3D model generated successfully! Found {len(walls)} wall segments.")
+                    st.success(f"✅ 3D model generated successfully! Found {len(walls)} wall segments "
+                               f"({len(normalized_walls)} after merging).")
                     
                 except Exception as e:
                     st.error(f"❌ Error generating 3D model: {str(e)}")
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
+        
+        model = st.session_state.get('model')
+        if model is not None and st.session_state.get('model_source') == (uploaded_file.name, uploaded_file.size):
+            # Display result directly on screen
+            with col2:
+                st.header("🎨 3D Model Result")
+                
+                # The full-resolution image is only rendered when requested;
+                # from then on the preview and download share one raster pass
+                download_ready = st.session_state.get('download_ready', False)
+                png = preview = None
+                if renderer == "Plotly (GPU)":
+                    try:
+                        st.plotly_chart(_plotly_figure(*model), use_container_width=True)
+                    except ImportError:
+                        st.warning("⚠️ Plotly is not installed; falling back to Matplotlib.")
+                        renderer = "Matplotlib"
+                if download_ready:
+                    png = preview = _render(*model, dpi=150, fmt='png', _figure=_get_figure())
+                elif renderer == "Matplotlib":
+                    preview = _render(*model, dpi=72, fmt='jpeg', _figure=_get_figure())
+                if renderer == "Matplotlib":
+                    st.image(preview, use_container_width=True)
+                
+                if download_ready:
+                    st.download_button(
+                        label="📥 Download 3D Model",
+                        data=png,
+                        file_name="3d_house_model.png",
+                        mime="image/png"
+                    )
+                else:
+                    st.button("🖼️ Prepare High-Resolution Download",
+                              on_click=lambda: st.session_state.update(download_ready=True))
     else:
         with col2:
             st.header("🎨 3D Model Result")
+            if submitted:
+                st.warning("⚠️ Please upload a floor plan image before generating.")
             st.info("👈 Upload a floor plan image to get started")
             
             # Show sample option
@@ -5,6 +5,14 @@ Utility script to create a sample floor plan for testing
 import cv2
 import numpy as np
 
+def _draw_wall(img: np.ndarray, x1: int, y1: int, x2: int, y2: int, thickness: int):
+    """Draw an axis-aligned black wall by assigning a slice of the image"""
+    half = thickness // 2
+    if y1 == y2:
+        img[y1 - half:y1 + half + 1, min(x1, x2) - half:max(x1, x2) + half + 1] = 0
+    else:
+        img[min(y1, y2) - half:max(y1, y2) + half + 1, x1 - half:x1 + half + 1] = 0
+
 def create_sample_floor_plan(output_path: str = "sample_floor_plan.png"):
     """
     Create a simple rectangular floor plan with rooms
@@ -16,17 +24,20 @@ def create_sample_floor_plan(output_path: str = "sample_floor_plan.png"):
     img = np.ones((800, 1000, 3), dtype=np.uint8) * 255
     
     # Draw outer walls (thick black lines)
-    cv2.rectangle(img, (50, 50), (950, 750), (0, 0, 0), 8)
+    _draw_wall(img, 50, 50, 950, 50, 8)
+    _draw_wall(img, 50, 750, 950, 750, 8)
+    _draw_wall(img, 50, 50, 50, 750, 8)
+    _draw_wall(img, 950, 50, 950, 750, 8)
     
     # Draw inner walls
     # Vertical wall dividing left and right
-    cv2.line(img, (500, 50), (500, 750), (0, 0, 0), 6)
+    _draw_wall(img, 500, 50, 500, 750, 6)
     
     # Horizontal wall in left section
-    cv2.line(img, (50, 400), (500, 400), (0, 0, 0), 6)
+    _draw_wall(img, 50, 400, 500, 400, 6)
     
     # Horizontal wall in right section
-    cv2.line(img, (500, 300), (950, 300), (0, 0, 0), 6)
+    _draw_wall(img, 500, 300, 950, 300, 6)
     
     # Save the image
     cv2.imwrite(output_path, img)
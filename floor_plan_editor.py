@@ -5,9 +5,368 @@ Create floor plans by dragging and dropping objects
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageDraw, ImageTk
+from PIL import Image, ImageColor, ImageDraw, ImageTk
+import cv2
 import os
-from PIL import Image, ImageDraw, ImageTk
+import importlib.util
+from functools import lru_cache
+import numpy as np
+
+
+# Furniture library: display name, footprint in pixels, fill color and emoji
+_FURNITURE_TYPES = {
+    "sofa": {"name": "Sofa", "width": 80, "height": 40, "color": "#8B4513", "emoji": "🛋️"},
+    "dining_table": {"name": "Dining Table", "width": 60, "height": 60, "color": "#654321", "emoji": "🍽️"},
+    "bed": {"name": "Bed", "width": 60, "height": 80, "color": "#4169E1", "emoji": "🛏️"},
+    "chair": {"name": "Chair", "width": 25, "height": 25, "color": "#8B4513", "emoji": "💺"},
+    "desk": {"name": "Desk", "width": 50, "height": 30, "color": "#654321", "emoji": "🖥️"},
+    "tv": {"name": "TV", "width": 40, "height": 25, "color": "#000000", "emoji": "📺"},
+    "refrigerator": {"name": "Refrigerator", "width": 30, "height": 50, "color": "#C0C0C0", "emoji": "❄️"},
+    "cabinet": {"name": "Cabinet", "width": 40, "height": 30, "color": "#8B4513", "emoji": "🗄️"},
+    "bookshelf": {"name": "Bookshelf", "width": 30, "height": 50, "color": "#654321", "emoji": "📚"},
+    "table": {"name": "Table", "width": 40, "height": 40, "color": "#8B4513", "emoji": "🪑"},
+    "wardrobe": {"name": "Wardrobe", "width": 50, "height": 60, "color": "#654321", "emoji": "👔"},
+    "bathtub": {"name": "Bathtub", "width": 50, "height": 30, "color": "#87CEEB", "emoji": "🛁"},
+}
+
+# Height of each furniture type in the 3D view (meters)
+_FURNITURE_HEIGHTS = {
+    "sofa": 0.4, "dining_table": 0.75, "bed": 0.5, "chair": 0.4,
+    "desk": 0.75, "tv": 0.6, "refrigerator": 1.8, "cabinet": 0.9,
+    "bookshelf": 1.5, "table": 0.75, "wardrobe": 2.0, "bathtub": 0.5
+}
+
+
+@lru_cache(maxsize=1)
+def _build_thumbs():
+    """Draw the 60x60 furniture library thumbnails once per process"""
+    thumbs = {}
+    for ftype, fdata in _FURNITURE_TYPES.items():
+        width = 60
+        height = 60
+        img = Image.new('RGB', (width, height), fdata['color'])
+        draw = ImageDraw.Draw(img)
+        
+        # Draw simple furniture shape based on type
+        if ftype == "sofa":
+            # Draw sofa shape
+            draw.rectangle([10, 20, 50, 40], fill='#654321', outline='black', width=2)
+            draw.ellipse([15, 15, 25, 25], fill='#8B4513', outline='black')
+            draw.ellipse([35, 15, 45, 25], fill='#8B4513', outline='black')
+        elif ftype == "bed":
+            # Draw bed shape
+            draw.rectangle([10, 15, 50, 45], fill='#4169E1', outline='black', width=2)
+            draw.rectangle([10, 10, 20, 15], fill='#1E90FF', outline='black')
+        elif ftype == "chair":
+            # Draw chair shape
+            draw.rectangle([20, 25, 40, 45], fill='#8B4513', outline='black', width=2)
+            draw.rectangle([20, 15, 25, 25], fill='#654321', outline='black')
+        elif ftype == "dining_table":
+            # Draw table shape
+            draw.ellipse([15, 15, 45, 45], fill='#654321', outline='black', width=2)
+            draw.rectangle([20, 20, 40, 40], fill='#8B4513', outline='black')
+        elif ftype == "tv":
+            # Draw TV shape
+            draw.rectangle([15, 20, 45, 40], fill='#000000', outline='gray', width=2)
+            draw.rectangle([20, 25, 40, 35], fill='#1a1a1a', outline='gray')
+        elif ftype == "refrigerator":
+            # Draw refrigerator shape
+            draw.rectangle([20, 10, 40, 50], fill='#C0C0C0', outline='black', width=2)
+            draw.line([30, 10, 30, 50], fill='black', width=1)
+        elif ftype == "desk":
+            # Draw desk shape
+            draw.rectangle([10, 25, 50, 35], fill='#654321', outline='black', width=2)
+            draw.rectangle([15, 35, 20, 45], fill='#8B4513', outline='black')
+            draw.rectangle([40, 35, 45, 45], fill='#8B4513', outline='black')
+        elif ftype == "cabinet":
+            # Draw cabinet shape
+            draw.rectangle([15, 20, 45, 40], fill='#8B4513', outline='black', width=2)
+            draw.line([30, 20, 30, 40], fill='black', width=1)
+        elif ftype == "bookshelf":
+            # Draw bookshelf shape
+            draw.rectangle([20, 10, 40, 50], fill='#654321', outline='black', width=2)
+            draw.line([20, 20, 40, 20], fill='black', width=1)
+            draw.line([20, 30, 40, 30], fill='black', width=1)
+            draw.line([20, 40, 40, 40], fill='black', width=1)
+        elif ftype == "table":
+            # Draw table shape
+            draw.ellipse([15, 15, 45, 45], fill='#8B4513', outline='black', width=2)
+        elif ftype == "wardrobe":
+            # Draw wardrobe shape
+            draw.rectangle([15, 10, 45, 50], fill='#654321', outline='black', width=2)
+            draw.line([30, 10, 30, 50], fill='black', width=1)
+        elif ftype == "bathtub":
+            # Draw bathtub shape
+            draw.ellipse([10, 20, 50, 40], fill='#87CEEB', outline='black', width=2)
+            draw.rectangle([15, 25, 45, 35], fill='#B0E0E6', outline='black')
+        else:
+            # Default rectangle
+            draw.rectangle([10, 10, 50, 50], fill=fdata['color'], outline='black', width=2)
+        
+        thumbs[ftype] = img
+    return thumbs
+
+
+@lru_cache(maxsize=512)
+def _fmt_len(dx, dy):
+    """Format a grid-snapped wall length as a meters label"""
+    if dx == 0 or dy == 0:
+        length = abs(dx) + abs(dy)  # Axis-aligned, no sqrt needed
+    else:
+        length = (dx * dx + dy * dy) ** 0.5
+    return f"{(length * 0.1) / 100:.2f}m"  # Convert to meters
+
+
+@lru_cache(maxsize=128)
+def _door_symbol(width, handles=True):
+    """Draw a door symbol (quarter-circle swing, optionally with two resize handles) centered in a square RGBA image"""
+    handle_size = 5
+    size = width + handle_size + 4
+    c = size / 2
+    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.pieslice([c - width/2, c - width/2, c + width/2, c + width/2], 270, 360, outline='brown', width=3)
+    for hx in (c - width/2, c + width/2) if handles else ():
+        draw.rectangle([hx - handle_size/2, c - handle_size/2, hx + handle_size/2, c + handle_size/2],
+                       fill='red', outline='darkred', width=1)
+    return img
+
+
+# Unit box standing on z=0: 4 bottom corners then the 4 corners above them
+_BOX_OFFSETS = np.array([
+    [-0.5, -0.5, 0], [0.5, -0.5, 0], [0.5, 0.5, 0], [-0.5, 0.5, 0],
+    [-0.5, -0.5, 1], [0.5, -0.5, 1], [0.5, 0.5, 1], [-0.5, 0.5, 1],
+], dtype=np.float32)
+# Corner indices of the bottom, top, front, back, left and right faces
+_BOX_FACE_IDX = np.array([
+    [0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4], [2, 3, 7, 6], [0, 3, 7, 4], [1, 2, 6, 5],
+], dtype=np.intp)
+# Faces without the bottom one; the 3D view looks at the house from above, so
+# bottoms are culled
+_BOX_FACE_IDX_NO_BOTTOM = np.ascontiguousarray(_BOX_FACE_IDX[1:])
+# Faces drawn for each stair step: top, front and back (no bottom, as above)
+_STEP_FACE_IDX = np.ascontiguousarray(_BOX_FACE_IDX[1:4])
+
+
+def _build_steps(origin, step_vec, size, n):
+    """(n, 8, 3) corners of n boxes of the given size, the i-th one offset by i * step_vec from origin"""
+    i = np.arange(n, dtype=np.float32)[:, None, None]
+    corners = _BOX_OFFSETS + np.array([0.5, 0.5, 0], np.float32)  # Unit box with its minimum corner at 0
+    f32 = np.float32
+    return np.asarray(origin, f32) + i * np.asarray(step_vec, f32) + corners[None] * np.asarray(size, f32)
+
+
+# The 3D viewer offers an "Open in pyvista" (GPU/VTK) button when pyvista is installed
+_HAVE_PYVISTA = importlib.util.find_spec('pyvista') is not None
+
+
+def _show_pyvista(meshes, title, root):
+    """Show (faces, Poly3DCollection style) batches in a pyvista window without blocking root's mainloop"""
+    import pyvista as pv
+    from matplotlib.colors import to_rgb
+    
+    plotter = pv.Plotter(title=title)
+    for faces, style in meshes:
+        faces = np.asarray(faces, dtype=np.float32).reshape(-1, 4, 3)
+        n = len(faces)
+        # VTK's flat cell layout: [4, i0, i1, i2, i3, 4, ...]
+        cells = np.hstack([np.full((n, 1), 4), np.arange(4 * n).reshape(n, 4)]).ravel()
+        mesh = pv.PolyData(faces.reshape(-1, 3), cells)
+        kwargs = dict(opacity=style.get('alpha', 1.0), show_edges=True, edge_color=style.get('edgecolor', 'black'))
+        if 'facecolors' in style:
+            mesh.cell_data['rgb'] = (np.array([to_rgb(c) for c in style['facecolors']]) * 255).astype(np.uint8)
+            plotter.add_mesh(mesh, scalars='rgb', rgb=True, **kwargs)
+        else:
+            plotter.add_mesh(mesh, color=style['facecolor'], **kwargs)
+    plotter.show_axes()
+    # Non-blocking window; Tk's event loop keeps it rendering until the user closes it
+    plotter.show(interactive_update=True, auto_close=False)
+    
+    def pump():
+        if not getattr(plotter, '_closed', False):
+            plotter.update()
+            root.after(50, pump)
+    
+    pump()
+
+
+def _stair_step_lines(x1, y1, x2, y2, direction):
+    """Step line segments (x1, y1, x2, y2) across a staircase rectangle"""
+    width = abs(x2 - x1)
+    height = abs(y2 - y1)
+    num_steps = max(3, min(10, int(max(width, height) / 15)))
+    if direction == "horizontal":
+        step_width = width / num_steps
+        return [(x1 + i * step_width, y1, x1 + i * step_width, y2) for i in range(1, num_steps)]
+    step_height = height / num_steps
+    return [(x1, y1 + i * step_height, x2, y1 + i * step_height) for i in range(1, num_steps)]
+
+
+def _rect_polys(rects):
+    """(N, 4, 2) int32 corner array for (x1, y1, x2, y2) rectangles, as cv2 polygon input"""
+    r = np.rint(np.asarray(rects, np.float64).reshape(-1, 4)).astype(np.int32)
+    return np.stack([r[:, [0, 1]], r[:, [2, 1]], r[:, [2, 3]], r[:, [0, 3]]], axis=1)
+
+
+def _nearest_wall_numpy(px, py, x1, y1, x2, y2):
+    """Index of and distance to the segment nearest to (px, py), vectorized over all segments"""
+    dx = x2 - x1
+    dy = y2 - y1
+    t = np.clip(((px - x1) * dx + (py - y1) * dy) / np.maximum(dx * dx + dy * dy, 1e-12), 0, 1)
+    dist2 = (px - x1 - t * dx) ** 2 + (py - y1 - t * dy) ** 2
+    i = int(np.argmin(dist2))
+    return i, float(np.sqrt(dist2[i]))
+
+
+@lru_cache(maxsize=1)
+def _nearest_wall_kernel():
+    """JIT-compiled nearest-segment search if numba is installed, otherwise the numpy version"""
+    try:
+        from numba import njit
+    except ImportError:
+        return _nearest_wall_numpy
+    
+    @njit(cache=True)
+    def nearest_wall(px, py, x1, y1, x2, y2):
+        best, best_d2 = -1, np.inf
+        for i in range(x1.shape[0]):
+            dx = x2[i] - x1[i]
+            dy = y2[i] - y1[i]
+            t = ((px - x1[i]) * dx + (py - y1[i]) * dy) / max(dx * dx + dy * dy, 1e-12)
+            t = min(max(t, 0.0), 1.0)
+            d2 = (px - x1[i] - t * dx) ** 2 + (py - y1[i] - t * dy) ** 2
+            if d2 < best_d2:
+                best, best_d2 = i, d2
+        return best, np.sqrt(best_d2)
+    
+    return nearest_wall
+
+
+def _nearest_on_walls_numpy(px, py, starts, dirs, lens):
+    """Index of the wall nearest to (px, py) and the nearest point on it; dirs are unit vectors"""
+    point = np.array([px, py], dtype=starts.dtype)
+    t = np.clip(((point - starts) * dirs).sum(axis=1), 0, lens)
+    nearest = starts + t[:, None] * dirs
+    i = int(((point - nearest) ** 2).sum(axis=1).argmin())  # squared distances, no sqrt
+    return i, float(nearest[i, 0]), float(nearest[i, 1])
+
+
+@lru_cache(maxsize=1)
+def _nearest_on_walls_kernel():
+    """JIT-compiled nearest-point-on-walls search if numba is installed, otherwise the numpy version"""
+    try:
+        from numba import njit
+    except ImportError:
+        return _nearest_on_walls_numpy
+    
+    @njit(cache=True, fastmath=True)
+    def nearest_on_walls(px, py, starts, dirs, lens):
+        best, best_d2, best_x, best_y = -1, np.inf, 0.0, 0.0
+        for i in range(starts.shape[0]):
+            t = (px - starts[i, 0]) * dirs[i, 0] + (py - starts[i, 1]) * dirs[i, 1]
+            t = min(max(t, 0.0), lens[i])
+            nx = starts[i, 0] + t * dirs[i, 0]
+            ny = starts[i, 1] + t * dirs[i, 1]
+            d2 = (px - nx) ** 2 + (py - ny) ** 2
+            if d2 < best_d2:
+                best, best_d2, best_x, best_y = i, d2, nx, ny
+        return best, best_x, best_y
+    
+    return nearest_on_walls
+
+
+class _ColumnStore:
+    """Named numeric columns stored as parallel arrays (SoA), grown by doubling"""
+    
+    def __init__(self, *names, capacity=16, dtype=np.int32):
+        self.names = names
+        self.data = np.empty((len(names), capacity), dtype)
+        self.count = 0
+    
+    def __getitem__(self, name):
+        """Return a view of the live part of one column"""
+        return self.data[self.names.index(name), :self.count]
+    
+    def append(self, *values):
+        if self.count == self.data.shape[1]:
+            grown = np.empty((len(self.names), 2 * self.count), self.data.dtype)
+            grown[:, :self.count] = self.data
+            self.data = grown
+        self.data[:, self.count] = values
+        self.count += 1
+    
+    def rows(self, *names, dtype=None):
+        """(count, len(names)) array of the given columns, one row per record"""
+        idx = [self.names.index(name) for name in names]
+        return self.data[idx, :self.count].T.astype(dtype or self.data.dtype)
+    
+    def set(self, index, **values):
+        for name, value in values.items():
+            self.data[self.names.index(name), index] = value
+    
+    def pop(self, index):
+        self.data[:, index:self.count - 1] = self.data[:, index + 1:self.count]
+        self.count -= 1
+    
+    def clear(self):
+        self.count = 0
+    
+    def find(self, name, value):
+        """Index of the first row whose column equals value, or None"""
+        hits = np.flatnonzero(self[name] == value)
+        return int(hits[0]) if hits.size else None
+
+
+class _SpatialHash:
+    """Uniform-grid spatial index mapping item ids to bounding boxes"""
+    
+    def __init__(self, cell=100):
+        self.cell = cell
+        self.cells = {}  # (col, row) -> set of item ids
+        self.boxes = {}  # item id -> (x1, y1, x2, y2)
+    
+    def _cells(self, bbox):
+        """Grid cells covered by a bounding box"""
+        c = self.cell
+        x1, y1, x2, y2 = bbox
+        for col in range(int(x1 // c), int(x2 // c) + 1):
+            for row in range(int(y1 // c), int(y2 // c) + 1):
+                yield col, row
+    
+    def insert(self, item_id, bbox):
+        bbox = (min(bbox[0], bbox[2]), min(bbox[1], bbox[3]), max(bbox[0], bbox[2]), max(bbox[1], bbox[3]))
+        self.boxes[item_id] = bbox
+        for key in self._cells(bbox):
+            self.cells.setdefault(key, set()).add(item_id)
+    
+    def remove(self, item_id):
+        bbox = self.boxes.pop(item_id, None)
+        if bbox is None:
+            return
+        for key in self._cells(bbox):
+            bucket = self.cells.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self.cells[key]
+    
+    def move(self, item_id, bbox):
+        self.remove(item_id)
+        self.insert(item_id, bbox)
+    
+    def clear(self):
+        self.cells.clear()
+        self.boxes.clear()
+    
+    def query(self, bbox):
+        """Ids whose bounding boxes intersect bbox, in creation (stacking) order"""
+        x1, y1, x2, y2 = bbox
+        found = set()
+        for key in self._cells(bbox):
+            found.update(self.cells.get(key, ()))
+        boxes = self.boxes
+        return sorted(i for i in found
+                      if boxes[i][0] <= x2 and boxes[i][2] >= x1 and boxes[i][1] <= y2 and boxes[i][3] >= y1)
 
 
 class FloorPlanEditor:
@@ -21,6 +380,9 @@ class FloorPlanEditor:
         self.canvas_width = 1000
         self.canvas_height = 700
         self.grid_size = 20
+        # Bit mask for snapping when grid_size is a power of two
+        self._grid_mask = ~(self.grid_size - 1) if self.grid_size & (self.grid_size - 1) == 0 else None
+        self._grid_photos = {}  # Background (grid + rulers) PhotoImages by canvas/grid settings
         self.scale = 1.0  # 1 pixel = 0.1 meters (adjustable)
         
         # Drawing state
@@ -29,21 +391,46 @@ class FloorPlanEditor:
         self.start_x = 0
         self.start_y = 0
         self.walls = []  # List of (x1, y1, x2, y2) tuples
+        self.wall_cols = _ColumnStore('x1', 'y1', 'x2', 'y2', 'id')  # Same walls as parallel arrays
         self.rooms = []  # List of room rectangles
         self.doors = []  # List of door positions (x, y, width, door_id, angle)
         self.selected_door = None  # Currently selected door for resizing
+        self._pending_drag = None  # Latest (x, y) from <B1-Motion>, applied on idle
+        self._drag_scheduled = False
+        self._temp_line = None  # Rubber-band preview items while dragging
+        self._temp_rect = None
+        self._xoff = self._yoff = 0  # Canvas scroll offsets, refreshed on every view change
+        self._last_view = None  # Viewport the staircase step lines were last synced to
+        self._item_pools = {'wall': [], 'room': []}  # Hidden, parked canvas items ready for reuse
         self.windows = []  # List of window positions (x, y, angle, wall_id)
-        self.staircases = []  # List of staircase positions (x, y, width, height, direction)
-        self.furniture = []  # List of furniture items (type, x, y, width, height, rotation, item_id)
+        self.staircases = []  # List of staircases (x1, y1, x2, y2, direction, stair_id, step_line_ids)
+        self.furniture = []  # List of furniture items (type, x, y, width, height, rotation, item_id, text_id)
+        self.furniture_cols = _ColumnStore('x', 'y', 'w', 'h', 'id', 'type')  # Same furniture as parallel arrays
+        # Per-type lookup tables indexed by the integer type code kept in furniture_cols['type']
+        self._ftype_to_code = {name: i for i, name in enumerate(_FURNITURE_TYPES)}
+        self._height_table = np.array([_FURNITURE_HEIGHTS.get(name, 0.5) for name in _FURNITURE_TYPES])  # Default height 0.5
+        self._color_table = np.array([fdata["color"] for fdata in _FURNITURE_TYPES.values()])
         self.selected_furniture = None  # Currently selected furniture for moving
         self.dragging_furniture = False
         self.selected_furniture_type = None  # Currently selected furniture type
+        self._furniture_by_id = {}  # Canvas item id -> index in self.furniture
+        self._door_by_id = {}  # Door item id -> index in self.doors
+        self._item_category = {}  # Canvas item id -> (kind, record) for erasable objects
+        self._door_photos = {}  # Door symbol PhotoImages by width
+        self._wall_labels = {}  # Wall item id -> its measurement label ids
+        self._room_labels = {}  # Room rectangle id -> its (measurement text, white box) ids
+        self.spatial_index = _SpatialHash()  # Bounding boxes of walls, rooms, doors, windows, stairs, furniture
         self.show_measurements = True  # Show measurements/rulers
+        self._3d_window = None  # 3D viewer window, its axes and canvas, reused across renders
+        self._3d_ax = None
+        self._3d_canvas = None  # Interactive canvas, only created once the user asks to rotate
+        self._3d_label = None  # Label showing the static off-screen render
+        self._3d_rotate_button = None
+        self._3d_meshes = []  # (faces, style) batches of the last render, for "Open in pyvista"
         self.measurement_scale = 1.0  # Scale factor for measurements
         
-        # Canvas image (for saving)
-        self.canvas_image = Image.new('RGB', (self.canvas_width, self.canvas_height), 'white')
-        self.canvas_draw = ImageDraw.Draw(self.canvas_image)
+        self._build_handler_tables()
+        self._bind_tool_handlers(self.current_tool)
         
         self.setup_ui()
         self.draw_grid()
@@ -79,6 +466,7 @@ class FloorPlanEditor:
         
         # Tool buttons
         self.tool_buttons = {}
+        self._selected_furn_frame = None  # Highlighted furniture library entry
         tools = [
             ("wall", "🧱 Wall", "Draw walls by clicking and dragging"),
             ("room", "🚪 Room", "Draw rectangular rooms"),
@@ -114,75 +502,22 @@ class FloorPlanEditor:
                 wraplength=180
             )
             tooltip.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self._selected_tool_btn = self.tool_buttons["wall"]  # Highlighted tool button
         
         # Furniture Tab
         furniture_tab = tk.Frame(notebook, bg='#e0e0e0')
         notebook.add(furniture_tab, text="🪑 Furniture")
         
         # Furniture library with images
-        self.furniture_types = {
-            "sofa": {"name": "Sofa", "width": 80, "height": 40, "color": "#8B4513", "emoji": "🛋️"},
-            "dining_table": {"name": "Dining Table", "width": 60, "height": 60, "color": "#654321", "emoji": "🍽️"},
-            "bed": {"name": "Bed", "width": 60, "height": 80, "color": "#4169E1", "emoji": "🛏️"},
-            "chair": {"name": "Chair", "width": 25, "height": 25, "color": "#8B4513", "emoji": "💺"},
-            "desk": {"name": "Desk", "width": 50, "height": 30, "color": "#654321", "emoji": "🖥️"},
-            "tv": {"name": "TV", "width": 40, "height": 25, "color": "#000000", "emoji": "📺"},
-            "refrigerator": {"name": "Refrigerator", "width": 30, "height": 50, "color": "#C0C0C0", "emoji": "❄️"},
-            "cabinet": {"name": "Cabinet", "width": 40, "height": 30, "color": "#8B4513", "emoji": "🗄️"},
-            "bookshelf": {"name": "Bookshelf", "width": 30, "height": 50, "color": "#654321", "emoji": "📚"},
-            "table": {"name": "Table", "width": 40, "height": 40, "color": "#8B4513", "emoji": "🪑"},
-            "wardrobe": {"name": "Wardrobe", "width": 50, "height": 60, "color": "#654321", "emoji": "👔"},
-            "bathtub": {"name": "Bathtub", "width": 50, "height": 30, "color": "#87CEEB", "emoji": "🛁"},
-        }
+        self.furniture_types = _FURNITURE_TYPES
         
-        # Create furniture images
+        # Furniture images and buttons are built the first time the tab is shown
         self.furniture_images = {}
-        self.create_furniture_images()
-        
-        # Furniture selection buttons with images
+        self._furniture_photos = {}  # Canvas PhotoImages pre-resized to each footprint, by (type, size)
         self.furniture_buttons = {}
-        furniture_canvas = tk.Canvas(furniture_tab, height=400, bg='#e0e0e0', highlightthickness=0)
-        furniture_scrollbar = tk.Scrollbar(furniture_tab, orient="vertical", command=furniture_canvas.yview)
-        furniture_scrollable = tk.Frame(furniture_canvas, bg='#e0e0e0')
-        
-        furniture_scrollable.bind(
-            "<Configure>",
-            lambda e: furniture_canvas.configure(scrollregion=furniture_canvas.bbox("all"))
-        )
-        
-        furniture_canvas.create_window((0, 0), window=furniture_scrollable, anchor="nw")
-        furniture_canvas.configure(yscrollcommand=furniture_scrollbar.set)
-        
-        for ftype, fdata in self.furniture_types.items():
-            # Create button with image
-            btn_frame = tk.Frame(furniture_scrollable, bg='#e0e0e0', relief=tk.RAISED, bd=2)
-            btn_frame.pack(fill=tk.X, padx=2, pady=2)
-            
-            # Image
-            if ftype in self.furniture_images:
-                img_label = tk.Label(btn_frame, image=self.furniture_images[ftype], bg='#e0e0e0')
-                img_label.pack(side=tk.LEFT, padx=5, pady=5)
-                img_label.image = self.furniture_images[ftype]  # Keep reference
-            
-            # Text label
-            text_label = tk.Label(
-                btn_frame,
-                text=f"{fdata['emoji']} {fdata['name']}",
-                font=('Arial', 9),
-                bg='#e0e0e0',
-                fg='black'
-            )
-            text_label.pack(side=tk.LEFT, padx=5)
-            
-            # Make entire frame clickable
-            btn_frame.bind("<Button-1>", lambda e, t=ftype: self.select_furniture_type(t))
-            img_label.bind("<Button-1>", lambda e, t=ftype: self.select_furniture_type(t))
-            text_label.bind("<Button-1>", lambda e, t=ftype: self.select_furniture_type(t))
-            
-            self.furniture_buttons[ftype] = btn_frame
-        
-        furniture_canvas.pack(side="left", fill="both", expand=True)
-        furniture_scrollbar.pack(side="right", fill="y")
+        self._furniture_tab = furniture_tab
+        self._furn_tab_ready = False
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
         
         # Actions section
         actions_frame = tk.LabelFrame(left_panel, text="Actions", font=('Arial', 11, 'bold'), bg='#e0e0e0')
@@ -267,8 +602,8 @@ class FloorPlanEditor:
             height=self.canvas_height,
             bg='white',
             scrollregion=(0, 0, self.canvas_width, self.canvas_height),
-            yscrollcommand=v_scrollbar.set,
-            xscrollcommand=h_scrollbar.set
+            yscrollcommand=lambda first, last: self._on_view_changed(v_scrollbar, first, last),
+            xscrollcommand=lambda first, last: self._on_view_changed(h_scrollbar, first, last)
         )
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
@@ -280,76 +615,98 @@ class FloorPlanEditor:
         self.canvas.bind("<B1-Motion>", self.on_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_release)
         self.canvas.bind("<Motion>", self.on_motion)
+        self.canvas.bind("<Configure>", self.refresh_visible)
+        # Door resize handles are only drawn while the pointer is over a door
+        self.canvas.tag_bind('door', '<Enter>', self._on_door_enter)
+        self.canvas.tag_bind('door', '<Leave>', self._on_door_leave)
         
         # Measurement labels
         self.measurement_labels = []
         
-    def create_furniture_images(self):
-        """Create simple furniture images programmatically"""
+    def _on_tab_changed(self, event):
+        """Build the furniture library on its first visit"""
+        notebook = event.widget
+        if not self._furn_tab_ready and notebook.nametowidget(notebook.select()) is self._furniture_tab:
+            self._populate_furniture_tab()
+        
+    def _populate_furniture_tab(self):
+        """Create the furniture images and selection buttons"""
+        self._furn_tab_ready = True
+        
+        # Create furniture images
+        self.create_furniture_images()
+        
+        # Furniture selection buttons with images
+        furniture_tab = self._furniture_tab
+        furniture_canvas = tk.Canvas(furniture_tab, height=400, bg='#e0e0e0', highlightthickness=0)
+        furniture_scrollbar = tk.Scrollbar(furniture_tab, orient="vertical", command=furniture_canvas.yview)
+        furniture_scrollable = tk.Frame(furniture_canvas, bg='#e0e0e0')
+        
+        furniture_scrollable.bind(
+            "<Configure>",
+            lambda e: furniture_canvas.configure(scrollregion=furniture_canvas.bbox("all"))
+        )
+        
+        furniture_canvas.create_window((0, 0), window=furniture_scrollable, anchor="nw")
+        furniture_canvas.configure(yscrollcommand=furniture_scrollbar.set)
+        
         for ftype, fdata in self.furniture_types.items():
-            width = 60
-            height = 60
-            img = Image.new('RGB', (width, height), fdata['color'])
-            draw = ImageDraw.Draw(img)
+            # Create button with image
+            btn_frame = tk.Frame(furniture_scrollable, bg='#e0e0e0', relief=tk.RAISED, bd=2)
+            btn_frame.pack(fill=tk.X, padx=2, pady=2)
             
-            # Draw simple furniture shape based on type
-            if ftype == "sofa":
-                # Draw sofa shape
-                draw.rectangle([10, 20, 50, 40], fill='#654321', outline='black', width=2)
-                draw.ellipse([15, 15, 25, 25], fill='#8B4513', outline='black')
-                draw.ellipse([35, 15, 45, 25], fill='#8B4513', outline='black')
-            elif ftype == "bed":
-                # Draw bed shape
-                draw.rectangle([10, 15, 50, 45], fill='#4169E1', outline='black', width=2)
-                draw.rectangle([10, 10, 20, 15], fill='#1E90FF', outline='black')
-            elif ftype == "chair":
-                # Draw chair shape
-                draw.rectangle([20, 25, 40, 45], fill='#8B4513', outline='black', width=2)
-                draw.rectangle([20, 15, 25, 25], fill='#654321', outline='black')
-            elif ftype == "dining_table":
-                # Draw table shape
-                draw.ellipse([15, 15, 45, 45], fill='#654321', outline='black', width=2)
-                draw.rectangle([20, 20, 40, 40], fill='#8B4513', outline='black')
-            elif ftype == "tv":
-                # Draw TV shape
-                draw.rectangle([15, 20, 45, 40], fill='#000000', outline='gray', width=2)
-                draw.rectangle([20, 25, 40, 35], fill='#1a1a1a', outline='gray')
-            elif ftype == "refrigerator":
-                # Draw refrigerator shape
-                draw.rectangle([20, 10, 40, 50], fill='#C0C0C0', outline='black', width=2)
-                draw.line([30, 10, 30, 50], fill='black', width=1)
-            elif ftype == "desk":
-                # Draw desk shape
-                draw.rectangle([10, 25, 50, 35], fill='#654321', outline='black', width=2)
-                draw.rectangle([15, 35, 20, 45], fill='#8B4513', outline='black')
-                draw.rectangle([40, 35, 45, 45], fill='#8B4513', outline='black')
-            elif ftype == "cabinet":
-                # Draw cabinet shape
-                draw.rectangle([15, 20, 45, 40], fill='#8B4513', outline='black', width=2)
-                draw.line([30, 20, 30, 40], fill='black', width=1)
-            elif ftype == "bookshelf":
-                # Draw bookshelf shape
-                draw.rectangle([20, 10, 40, 50], fill='#654321', outline='black', width=2)
-                draw.line([20, 20, 40, 20], fill='black', width=1)
-                draw.line([20, 30, 40, 30], fill='black', width=1)
-                draw.line([20, 40, 40, 40], fill='black', width=1)
-            elif ftype == "table":
-                # Draw table shape
-                draw.ellipse([15, 15, 45, 45], fill='#8B4513', outline='black', width=2)
-            elif ftype == "wardrobe":
-                # Draw wardrobe shape
-                draw.rectangle([15, 10, 45, 50], fill='#654321', outline='black', width=2)
-                draw.line([30, 10, 30, 50], fill='black', width=1)
-            elif ftype == "bathtub":
-                # Draw bathtub shape
-                draw.ellipse([10, 20, 50, 40], fill='#87CEEB', outline='black', width=2)
-                draw.rectangle([15, 25, 45, 35], fill='#B0E0E6', outline='black')
-            else:
-                # Default rectangle
-                draw.rectangle([10, 10, 50, 50], fill=fdata['color'], outline='black', width=2)
+            # Image
+            if ftype in self.furniture_images:
+                img_label = tk.Label(btn_frame, image=self.furniture_images[ftype], bg='#e0e0e0')
+                img_label.pack(side=tk.LEFT, padx=5, pady=5)
+                img_label.image = self.furniture_images[ftype]  # Keep reference
+            
+            # Text label
+            text_label = tk.Label(
+                btn_frame,
+                text=f"{fdata['emoji']} {fdata['name']}",
+                font=('Arial', 9),
+                bg='#e0e0e0',
+                fg='black'
+            )
+            text_label.pack(side=tk.LEFT, padx=5)
             
-            # Convert to PhotoImage
+            # Make entire frame clickable
+            btn_frame.bind("<Button-1>", lambda e, t=ftype: self.select_furniture_type(t))
+            img_label.bind("<Button-1>", lambda e, t=ftype: self.select_furniture_type(t))
+            text_label.bind("<Button-1>", lambda e, t=ftype: self.select_furniture_type(t))
+            
+            self.furniture_buttons[ftype] = btn_frame
+        
+        furniture_canvas.pack(side="left", fill="both", expand=True)
+        furniture_scrollbar.pack(side="right", fill="y")
+        
+    def _on_view_changed(self, scrollbar, first, last):
+        """Update a scrollbar and the cached scroll offsets whenever the canvas view moves"""
+        scrollbar.set(first, last)
+        self._xoff = self.canvas.canvasx(0)
+        self._yoff = self.canvas.canvasy(0)
+        self.refresh_visible()
+        
+    def _canvas_xy(self, event):
+        """Event position in canvas coordinates, using the cached scroll offsets"""
+        return event.x + self._xoff, event.y + self._yoff
+        
+    def create_furniture_images(self):
+        """Wrap the shared furniture thumbnails as PhotoImages for this Tk root"""
+        for ftype, img in _build_thumbs().items():
             self.furniture_images[ftype] = ImageTk.PhotoImage(img)
+            # Pre-resize the canvas version to the furniture footprint so placing it never rescales
+            fdata = self.furniture_types[ftype]
+            self._furniture_photo(ftype, (fdata["width"], fdata["height"]))
+        
+    def _furniture_photo(self, ftype, size):
+        """Furniture PhotoImage resized to size (NEAREST), created once per type and size"""
+        photo = self._furniture_photos.get((ftype, size))
+        if photo is None:
+            photo = self._furniture_photos[ftype, size] = ImageTk.PhotoImage(
+                _build_thumbs()[ftype].resize(size, Image.NEAREST))
+        return photo
         
     def draw_grid(self):
         """Draw grid on canvas with measurements"""
@@ -361,63 +718,65 @@ class FloorPlanEditor:
                 pass
         self.measurement_labels = []
         
-        # Draw grid
-        for x in range(0, self.canvas_width, self.grid_size):
-            self.canvas.create_line(x, 0, x, self.canvas_height, fill='#e0e0e0', width=1, tags='grid')
-            # Add measurement labels every 5 grid units
-            if x % (self.grid_size * 5) == 0 and self.show_measurements and x > 0:
-                # Convert to meters (assuming 1 pixel = 0.1 meters)
-                meters = (x * 0.1) / 100  # Convert to meters
-                label = self.canvas.create_text(x, 5, text=f"{meters:.1f}m", font=('Arial', 7), fill='#666', tags='measurement')
-                self.measurement_labels.append(label)
-        
-        for y in range(0, self.canvas_height, self.grid_size):
-            self.canvas.create_line(0, y, self.canvas_width, y, fill='#e0e0e0', width=1, tags='grid')
-            # Add measurement labels every 5 grid units
-            if y % (self.grid_size * 5) == 0 and self.show_measurements and y > 0:
-                meters = (y * 0.1) / 100  # Convert to meters
-                label = self.canvas.create_text(5, y, text=f"{meters:.1f}m", font=('Arial', 7), fill='#666', tags='measurement')
-                self.measurement_labels.append(label)
+        # Render rulers and grid lines once into an image and blit it as a single canvas item;
+        # one image is kept per canvas/grid setting, so toggling measurements just swaps images
+        self.canvas.delete('grid')
+        grid_key = (self.canvas_width, self.canvas_height, self.grid_size, self.show_measurements)
+        grid_photo = self._grid_photos.get(grid_key)
+        if grid_photo is None:
+            grid = np.full((self.canvas_height, self.canvas_width, 3), 255, np.uint8)
+            if self.show_measurements:
+                self.draw_rulers(grid)
+            # Two strided slice writes paint every grid line
+            grid[:, ::self.grid_size] = (224, 224, 224)
+            grid[::self.grid_size, :] = (224, 224, 224)
+            grid_photo = self._grid_photos[grid_key] = ImageTk.PhotoImage(Image.fromarray(grid))  # Keep reference
+        self.canvas.create_image(0, 0, image=grid_photo, anchor='nw', tags='grid')
+        
+        # Add measurement labels every 5 grid units
+        if self.show_measurements:
+            step = self.grid_size * 5
+            # Convert to meters (assuming 1 pixel = 0.1 meters)
+            labels = [(x, 5, (x * 0.1) / 100) for x in range(step, self.canvas_width, step)]
+            labels += [(5, y, (y * 0.1) / 100) for y in range(step, self.canvas_height, step)]
+            # Create all labels with one Tcl script instead of one round trip per label
+            canvas = str(self.canvas)
+            script = " ".join(
+                f"[{canvas} create text {lx} {ly} -text {{{meters:.1f}m}} -font {{Arial 7}} -fill #666 -tags measurement]"
+                for lx, ly, meters in labels
+            )
+            label_ids = self.canvas.tk.splitlist(self.canvas.tk.eval(f"list {script}"))
+            self.measurement_labels.extend(int(label_id) for label_id in label_ids)
         
-        self.canvas.tag_lower('grid')
+        # The background image is opaque, so it must sit below the labels
         self.canvas.tag_lower('measurement')
-        
-        # Draw rulers on edges
-        if self.show_measurements:
-            self.draw_rulers()
+        self.canvas.tag_lower('grid')
     
-    def draw_rulers(self):
-        """Draw measurement rulers on canvas edges"""
+    def draw_rulers(self, buf):
+        """Paint measurement rulers on the edges of the (H, W, 3) background buffer"""
         ruler_height = 20
         ruler_width = 20
-        # Top ruler
-        self.canvas.create_rectangle(0, 0, self.canvas_width, ruler_height, fill='#f0f0f0', outline='#ccc', tags='ruler')
-        # Bottom ruler
-        self.canvas.create_rectangle(0, self.canvas_height - ruler_height, self.canvas_width, self.canvas_height, fill='#f0f0f0', outline='#ccc', tags='ruler')
-        # Left ruler
-        self.canvas.create_rectangle(0, 0, ruler_width, self.canvas_height, fill='#f0f0f0', outline='#ccc', tags='ruler')
-        # Right ruler
-        self.canvas.create_rectangle(self.canvas_width - ruler_width, 0, self.canvas_width, self.canvas_height, fill='#f0f0f0', outline='#ccc', tags='ruler')
-        
-        self.canvas.tag_lower('ruler')
+        fill = (240, 240, 240)  # #f0f0f0
+        outline = (204, 204, 204)  # #ccc
+        # Top, bottom, left and right rulers
+        buf[:ruler_height] = fill
+        buf[-ruler_height:] = fill
+        buf[:, :ruler_width] = fill
+        buf[:, -ruler_width:] = fill
+        # Ruler outlines
+        buf[[0, ruler_height, -ruler_height - 1, -1]] = outline
+        buf[:, [0, ruler_width, -ruler_width - 1, -1]] = outline
         
     def select_furniture_type(self, ftype):
         """Select a furniture type from the library"""
         self.selected_furniture_type = ftype
         self.current_tool = "furniture"
+        self._bind_tool_handlers("furniture")
         
-        # Update furniture button colors
-        for f_id, btn_frame in self.furniture_buttons.items():
-            if f_id == ftype:
-                btn_frame.config(relief=tk.SUNKEN, bg='#4CAF50')
-                for widget in btn_frame.winfo_children():
-                    if isinstance(widget, tk.Label):
-                        widget.config(bg='#4CAF50')
-            else:
-                btn_frame.config(relief=tk.RAISED, bg='#e0e0e0')
-                for widget in btn_frame.winfo_children():
-                    if isinstance(widget, tk.Label):
-                        widget.config(bg='#e0e0e0')
+        # Update furniture button colors (only the previous and the new selection change)
+        self._style_furniture_frame(self._selected_furn_frame, False)
+        self._selected_furn_frame = self.furniture_buttons[ftype]
+        self._style_furniture_frame(self._selected_furn_frame, True)
         
         fname = self.furniture_types[ftype]["name"]
         fdata = self.furniture_types[ftype]
@@ -426,12 +785,13 @@ class FloorPlanEditor:
     def set_tool(self, tool):
         """Set the current drawing tool"""
         self.current_tool = tool
-        # Update button colors
-        for tool_id, btn in self.tool_buttons.items():
-            if tool_id == tool:
-                btn.config(bg='#4CAF50', relief=tk.SUNKEN)
-            else:
-                btn.config(bg='#2196F3', relief=tk.RAISED)
+        self._bind_tool_handlers(tool)
+        # Update button colors (only the previous and the new tool change)
+        if self._selected_tool_btn is not None:
+            self._selected_tool_btn.config(bg='#2196F3', relief=tk.RAISED)
+        self._selected_tool_btn = self.tool_buttons.get(tool)
+        if self._selected_tool_btn is not None:
+            self._selected_tool_btn.config(bg='#4CAF50', relief=tk.SUNKEN)
         
         # Update info
         tool_info = {
@@ -448,216 +808,289 @@ class FloorPlanEditor:
         # If switching away from furniture, deselect furniture type
         if tool != "furniture":
             self.selected_furniture_type = None
-            for btn in self.furniture_buttons.values():
-                btn.config(bg='#E0E0E0', relief=tk.RAISED)
+            self._style_furniture_frame(self._selected_furn_frame, False)
+            self._selected_furn_frame = None
+        
+    def _style_furniture_frame(self, btn_frame, selected):
+        """Restyle one furniture library entry as selected or not"""
+        if btn_frame is None:
+            return
+        bg = '#4CAF50' if selected else '#e0e0e0'
+        btn_frame.config(relief=tk.SUNKEN if selected else tk.RAISED, bg=bg)
+        for widget in btn_frame.winfo_children():
+            if isinstance(widget, tk.Label):
+                widget.config(bg=bg)
+        
+    def _build_handler_tables(self):
+        """Map each tool to its click, drag and release handlers"""
+        self._click_handlers = {
+            "wall": self._click_start_drawing,
+            "room": self._click_start_drawing,
+            "window": self._click_start_drawing,
+            "staircase": self._click_start_drawing,
+            "door": self._click_door,
+            "furniture": self._click_furniture,
+            "erase": self._click_erase,
+        }
+        self._drag_handlers = {
+            "wall": self._drag_wall,
+            "room": self._drag_rect,
+            "staircase": self._drag_rect,
+            "door": self._drag_door,
+        }
+        self._release_handlers = {
+            "wall": self._release_wall,
+            "room": self._release_room,
+            "window": self._release_window,
+            "staircase": self._release_staircase,
+            "door": self._release_door,
+            "furniture": self._release_furniture,
+        }
+        
+    def _bind_tool_handlers(self, tool):
+        """Select the event handlers for a tool once, so events need no tool comparisons"""
+        self._on_click = self._click_handlers.get(tool, self._ignore_event)
+        self._on_drag = self._drag_handlers.get(tool, self._ignore_event)
+        self._on_release = self._release_handlers.get(tool, self._ignore_event)
+        
+    def _ignore_event(self, x, y):
+        """Handler for tools that do not react to an event"""
         
     def on_click(self, event):
         """Handle mouse click"""
-        x = self.canvas.canvasx(event.x)
-        y = self.canvas.canvasy(event.y)
-        
-        if self.current_tool == "erase":
-            self.erase_at(x, y)
-        elif self.current_tool == "furniture":
-            # Check if clicking on existing furniture to move it
-            items = self.canvas.find_overlapping(x - 10, y - 10, x + 10, y + 10)
-            for item in items:
-                tags = self.canvas.gettags(item)
-                if 'furniture' in tags:
-                    # Find which furniture this is
-                    for i, (ftype, fx, fy, fw, fh, rot, fid) in enumerate(self.furniture):
-                        if fid == item:
-                            self.selected_furniture = i
-                            self.dragging_furniture = True
-                            self.start_x = x
-                            self.start_y = y
-                            return
-            # Otherwise, place new furniture if type is selected
-            if self.selected_furniture_type:
-                self.add_furniture(self.selected_furniture_type, x, y)
-        elif self.current_tool == "door":
-            # Check if clicking on a door handle for resizing
-            items = self.canvas.find_overlapping(x - 5, y - 5, x + 5, y + 5)
-            for item in items:
-                tags = self.canvas.gettags(item)
-                if 'handle' in tags:
-                    # Find which door this handle belongs to
-                    for i, door_data in enumerate(self.doors):
-                        if len(door_data) >= 6 and (item == door_data[4] or item == door_data[5]):
-                            self.selected_door = i
-                            self.drawing = True
-                            self.start_x = x
-                            self.start_y = y
-                            return
-            # Otherwise, place a new door
-            self.add_door(x, y)
-        else:
+        x, y = self._canvas_xy(event)
+        self._on_click(x, y)
+        
+    def _click_start_drawing(self, x, y):
+        """Start a drag-to-draw gesture"""
+        self.drawing = True
+        self.start_x = x
+        self.start_y = y
+        
+    def _click_erase(self, x, y):
+        """Erase whatever is under the cursor"""
+        self.erase_at(x, y)
+        
+    def _click_furniture(self, x, y):
+        """Pick up existing furniture or place the selected type"""
+        # Check if clicking on existing furniture to move it
+        index = self._pick_furniture(x, y, tolerance=10)
+        if index is not None:
+            self.selected_furniture = index
+            self.dragging_furniture = True
+            self.start_x = x
+            self.start_y = y
+            return
+        # Otherwise, place new furniture if type is selected
+        if self.selected_furniture_type:
+            self.add_furniture(self.selected_furniture_type, x, y)
+            
+    def _click_door(self, x, y):
+        """Start resizing the clicked door or place a new one"""
+        # Check if clicking on a door for resizing
+        items = self.canvas.find_overlapping(x - 5, y - 5, x + 5, y + 5)
+        index = next((self._door_by_id[item] for item in items if item in self._door_by_id), None)
+        if index is not None:
+            self.selected_door = index
             self.drawing = True
             self.start_x = x
             self.start_y = y
+            return
+        # Otherwise, place a new door
+        self.add_door(x, y)
             
     def on_drag(self, event):
-        """Handle mouse drag"""
-        x = self.canvas.canvasx(event.x)
-        y = self.canvas.canvasy(event.y)
+        """Handle mouse drag (coalesced: only the latest position is applied per idle cycle)"""
+        self._pending_drag = self._canvas_xy(event)
+        if not self._drag_scheduled:
+            self._drag_scheduled = True
+            self.canvas.after_idle(self._apply_drag)
+            
+    def _apply_drag(self):
+        """Apply the most recent drag position"""
+        self._drag_scheduled = False
+        if self._pending_drag is None:
+            return
+        x, y = self._pending_drag
+        self._pending_drag = None
         
         # Handle furniture dragging
         if self.dragging_furniture and self.selected_furniture is not None:
-            furniture_data = self.furniture[self.selected_furniture]
-            ftype, old_x, old_y, fw, fh, rot, fid = furniture_data
-            
-            # Calculate new position
-            dx = x - self.start_x
-            dy = y - self.start_y
-            new_x = old_x + dx
-            new_y = old_y + dy
-            
-            # Snap to grid
-            new_x = round(new_x / self.grid_size) * self.grid_size
-            new_y = round(new_y / self.grid_size) * self.grid_size
+            self._drag_furniture(x, y)
+        elif self.drawing:
+            self._on_drag(x, y)
             
-            # Update furniture position
+    def _drag_furniture(self, x, y):
+        """Move the picked-up furniture with the pointer"""
+        furniture_data = self.furniture[self.selected_furniture]
+        ftype, old_x, old_y, fw, fh, rot, fid, tid = furniture_data
+        
+        # Calculate new position
+        dx = x - self.start_x
+        dy = y - self.start_y
+        new_x = old_x + dx
+        new_y = old_y + dy
+        
+        # Snap to grid
+        new_x = self._snap(new_x)
+        new_y = self._snap(new_y)
+        
+        # Update furniture position (image items take a single anchor point)
+        if ftype in self.furniture_images:
+            self.canvas.coords(fid, new_x, new_y)
+        else:
             self.canvas.coords(fid, 
                 new_x - fw/2, new_y - fh/2,
                 new_x + fw/2, new_y + fh/2)
-            
-            # Update text position
-            for item in self.canvas.find_withtag('furniture'):
-                item_coords = self.canvas.coords(item)
-                if len(item_coords) == 2:  # Text item
-                    if abs(item_coords[0] - old_x) < 5 and abs(item_coords[1] - old_y) < 5:
-                        self.canvas.coords(item, new_x, new_y)
-            
-            # Update furniture data
-            self.furniture[self.selected_furniture] = (ftype, new_x, new_y, fw, fh, rot, fid)
-            self.start_x = x
-            self.start_y = y
-            return
         
-        if not self.drawing:
-            return
-            
-        # Delete temporary drawings
-        if hasattr(self, 'temp_line'):
-            self.canvas.delete(self.temp_line)
-            delattr(self, 'temp_line')
-        if hasattr(self, 'temp_rect'):
-            self.canvas.delete(self.temp_rect)
-            delattr(self, 'temp_rect')
+        # Update text position
+        self.canvas.coords(tid, new_x, new_y + fh/2 + 10)
+        
+        # Update furniture data
+        self.furniture[self.selected_furniture] = (ftype, new_x, new_y, fw, fh, rot, fid, tid)
+        self.furniture_cols.set(self.selected_furniture, x=new_x, y=new_y)
+        self.spatial_index.move(fid, (new_x - fw/2, new_y - fh/2, new_x + fw/2, new_y + fh/2))
+        self.start_x = x
+        self.start_y = y
         
+    def _drag_door(self, x, y):
+        """Resize the selected door"""
         # Handle door resizing
-        if self.current_tool == "door" and self.selected_door is not None:
-            door_data = self.doors[self.selected_door]
-            door_x, door_y, door_width, door_id, handle1, handle2, angle = door_data
-            
-            # Calculate new width based on drag distance
-            dx = x - self.start_x
-            new_width = max(15, min(80, door_width + dx * 2))  # Min 15, max 80 pixels
-            
-            # Update door
-            self.canvas.coords(door_id, 
-                door_x - new_width/2, door_y - new_width/2,
-                door_x + new_width/2, door_y + new_width/2)
-            
-            # Update handles
-            handle_size = 5
-            self.canvas.coords(handle1,
-                door_x - new_width/2 - handle_size/2, door_y - handle_size/2,
-                door_x - new_width/2 + handle_size/2, door_y + handle_size/2)
-            self.canvas.coords(handle2,
-                door_x + new_width/2 - handle_size/2, door_y - handle_size/2,
-                door_x + new_width/2 + handle_size/2, door_y + handle_size/2)
-            
-            # Update door data
-            self.doors[self.selected_door] = (door_x, door_y, new_width, door_id, handle1, handle2, angle)
+        if self.selected_door is None:
             return
+        door_data = self.doors[self.selected_door]
+        door_x, door_y, door_width, door_id, angle = door_data
+        
+        # Calculate new width based on drag distance
+        dx = x - self.start_x
+        new_width = int(round(max(15, min(80, door_width + dx * 2))))  # Min 15, max 80 pixels
         
-        # Draw temporary line/rectangle
-        if self.current_tool == "wall":
-            self.temp_line = self.canvas.create_line(
+        # Update door (symbol and handles are one image item)
+        self.canvas.itemconfigure(door_id, image=self._door_photo(new_width, handles=True))
+        
+        # Update door data
+        self.doors[self.selected_door] = (door_x, door_y, new_width, door_id, angle)
+        self._index_door(door_id, door_x, door_y, new_width)
+        
+    def _drag_wall(self, x, y):
+        """Update the rubber-band wall preview"""
+        # Draw temporary line, created on the first drag step and moved afterwards
+        if self._temp_line is None:
+            self._temp_line = self.canvas.create_line(
                 self.start_x, self.start_y, x, y,
                 fill='black', width=4, tags='temp'
             )
-        elif self.current_tool == "room":
-            # Ensure proper order for rectangle
-            x1, x2 = min(self.start_x, x), max(self.start_x, x)
-            y1, y2 = min(self.start_y, y), max(self.start_y, y)
-            self.temp_rect = self.canvas.create_rectangle(
-                x1, y1, x2, y2,
-                outline='blue', width=2, tags='temp', dash=(5, 5)
-            )
-        elif self.current_tool == "staircase":
-            # Ensure proper order for rectangle
-            x1, x2 = min(self.start_x, x), max(self.start_x, x)
-            y1, y2 = min(self.start_y, y), max(self.start_y, y)
-            self.temp_rect = self.canvas.create_rectangle(
+        else:
+            self.canvas.coords(self._temp_line, self.start_x, self.start_y, x, y)
+            
+    def _drag_rect(self, x, y):
+        """Update the rubber-band room/staircase preview"""
+        # Draw temporary rectangle (room or staircase), created once and moved afterwards
+        # Ensure proper order for rectangle
+        x1, x2 = min(self.start_x, x), max(self.start_x, x)
+        y1, y2 = min(self.start_y, y), max(self.start_y, y)
+        if self._temp_rect is None:
+            if self.current_tool == "room":
+                style = dict(outline='blue', dash=(5, 5))
+            else:
+                style = dict(outline='orange', dash=(3, 3))
+            self._temp_rect = self.canvas.create_rectangle(
                 x1, y1, x2, y2,
-                outline='orange', width=2, tags='temp', dash=(3, 3)
+                width=2, tags='temp', **style
             )
+        else:
+            self.canvas.coords(self._temp_rect, x1, y1, x2, y2)
             
     def on_release(self, event):
         """Handle mouse release"""
-        if not self.drawing:
+        # Flush a drag position that is still waiting for the idle callback
+        self._apply_drag()
+        
+        if not self.drawing and not self.dragging_furniture:
             return
             
-        x = self.canvas.canvasx(event.x)
-        y = self.canvas.canvasy(event.y)
+        x, y = self._canvas_xy(event)
         
-        # Delete temporary drawing
-        if hasattr(self, 'temp_line'):
-            self.canvas.delete(self.temp_line)
-        if hasattr(self, 'temp_rect'):
-            self.canvas.delete(self.temp_rect)
+        # Delete temporary rectangle
+        if self._temp_rect is not None:
+            self.canvas.delete(self._temp_rect)
+            self._temp_rect = None
         
         # Create permanent object
-        if self.current_tool == "wall":
-            if abs(x - self.start_x) > 5 or abs(y - self.start_y) > 5:  # Minimum length
-                self.add_wall(self.start_x, self.start_y, x, y)
-        elif self.current_tool == "room":
-            # Check minimum size (both width and height must be > 20)
-            if abs(x - self.start_x) > 20 and abs(y - self.start_y) > 20:  # Minimum size
-                self.add_room(self.start_x, self.start_y, x, y)
-        elif self.current_tool == "door":
-            if self.selected_door is not None:
-                # Finished resizing
-                self.selected_door = None
-            else:
-                # This shouldn't happen as door is added on click
-                pass
-        elif self.current_tool == "window":
-            self.add_window(x, y)
-        elif self.current_tool == "staircase":
-            # Check minimum size
-            if abs(x - self.start_x) > 20 and abs(y - self.start_y) > 20:
-                self.add_staircase(self.start_x, self.start_y, x, y)
-        elif self.current_tool == "furniture":
-            if self.dragging_furniture:
-                self.dragging_furniture = False
-                self.selected_furniture = None
+        self._on_release(x, y)
+        
+        # Delete a temporary line that did not become a wall
+        if self._temp_line is not None:
+            self.canvas.delete(self._temp_line)
+            self._temp_line = None
         
         self.drawing = False
         
+    def _release_wall(self, x, y):
+        """Finish a wall"""
+        if abs(x - self.start_x) > 5 or abs(y - self.start_y) > 5:  # Minimum length
+            # The wall takes over the temporary line item
+            self.add_wall(self.start_x, self.start_y, x, y, item=self._temp_line)
+            self._temp_line = None
+            
+    def _release_room(self, x, y):
+        """Finish a room"""
+        # Check minimum size (both width and height must be > 20)
+        if abs(x - self.start_x) > 20 and abs(y - self.start_y) > 20:  # Minimum size
+            self.add_room(self.start_x, self.start_y, x, y)
+            
+    def _release_door(self, x, y):
+        """Finish a door resize"""
+        # Finished resizing (doors themselves are added on click)
+        if self.selected_door is not None:
+            door_id = self.doors[self.selected_door][3]
+            if door_id not in self.canvas.find_withtag('current'):
+                self._set_door_handles(self.selected_door, False)
+        self.selected_door = None
+        
+    def _release_window(self, x, y):
+        """Place a window"""
+        self.add_window(x, y)
+        
+    def _release_staircase(self, x, y):
+        """Finish a staircase"""
+        # Check minimum size
+        if abs(x - self.start_x) > 20 and abs(y - self.start_y) > 20:
+            self.add_staircase(self.start_x, self.start_y, x, y)
+            
+    def _release_furniture(self, x, y):
+        """Drop the furniture being moved"""
+        if self.dragging_furniture:
+            self.dragging_furniture = False
+            self.selected_furniture = None
+        
     def on_motion(self, event):
         """Handle mouse motion for cursor feedback"""
-        x = self.canvas.canvasx(event.x)
-        y = self.canvas.canvasy(event.y)
+        x, y = self._canvas_xy(event)
         # Could add cursor changes or coordinate display here
         
-    def add_wall(self, x1, y1, x2, y2):
-        """Add a wall to the canvas with measurements"""
+    def add_wall(self, x1, y1, x2, y2, item=None):
+        """Add a wall to the canvas with measurements (optionally reusing an existing line item)"""
         # Snap to grid
-        x1 = round(x1 / self.grid_size) * self.grid_size
-        y1 = round(y1 / self.grid_size) * self.grid_size
-        x2 = round(x2 / self.grid_size) * self.grid_size
-        y2 = round(y2 / self.grid_size) * self.grid_size
-        
-        wall_id = self.canvas.create_line(x1, y1, x2, y2, fill='black', width=6, tags='wall')
+        x1 = self._snap(x1)
+        y1 = self._snap(y1)
+        x2 = self._snap(x2)
+        y2 = self._snap(y2)
+        
+        if item is None:
+            item = self._reuse_item('wall')
+        if item is not None:
+            self.canvas.coords(item, x1, y1, x2, y2)
+            self.canvas.itemconfigure(item, fill='black', width=6, tags='wall', state='normal')
+            wall_id = item
+        else:
+            wall_id = self.canvas.create_line(x1, y1, x2, y2, fill='black', width=6, tags='wall')
         self.walls.append((x1, y1, x2, y2, wall_id))
+        self.wall_cols.append(x1, y1, x2, y2, wall_id)
+        self._track_item(wall_id, 'wall', (x1 - 3, y1 - 3, x2 + 3, y2 + 3))
         
         # Add measurement label
         if self.show_measurements:
-            length = ((x2 - x1)**2 + (y2 - y1)**2)**0.5
-            length_m = (length * 0.1) / 100  # Convert to meters
             mid_x = (x1 + x2) / 2
             mid_y = (y1 + y2) / 2
             # Offset label perpendicular to wall
@@ -672,16 +1105,20 @@ class FloorPlanEditor:
             
             measurement_id = self.canvas.create_text(
                 label_x, label_y,
-                text=f"{length_m:.2f}m",
+                text=_fmt_len(x2 - x1, y2 - y1),
                 font=('Arial', 8, 'bold'),
                 fill='blue',
-                tags=('wall', 'measurement'),
-                bg='white'
+                tags=('wall', 'measurement')
             )
-            self.measurement_labels.append(measurement_id)
-        
-        # Update canvas image
-        self.canvas_draw.line([(x1, y1), (x2, y2)], fill='black', width=6)
+            # Canvas text has no background option; put a white box right behind the label
+            bg_id = self.canvas.create_rectangle(
+                self.canvas.bbox(measurement_id),
+                fill='white', outline='',
+                tags=('wall', 'measurement')
+            )
+            self.canvas.tag_lower(bg_id, measurement_id)
+            self.measurement_labels.extend((measurement_id, bg_id))
+            self._wall_labels[wall_id] = (measurement_id, bg_id)
         
     def add_room(self, x1, y1, x2, y2):
         """Add a room rectangle - creates walls around the room"""
@@ -690,10 +1127,10 @@ class FloorPlanEditor:
         y1, y2 = min(y1, y2), max(y1, y2)
         
         # Snap to grid
-        x1 = round(x1 / self.grid_size) * self.grid_size
-        y1 = round(y1 / self.grid_size) * self.grid_size
-        x2 = round(x2 / self.grid_size) * self.grid_size
-        y2 = round(y2 / self.grid_size) * self.grid_size
+        x1 = self._snap(x1)
+        y1 = self._snap(y1)
+        x2 = self._snap(x2)
+        y2 = self._snap(y2)
         
         # Check minimum size
         if abs(x2 - x1) < 20 or abs(y2 - y1) < 20:
@@ -712,67 +1149,111 @@ class FloorPlanEditor:
         
         # Create a room rectangle for visual reference
         # This helps identify the room area
-        try:
+        room_id = self._reuse_item('room')
+        if room_id is not None:
+            self.canvas.coords(room_id, x1 + 3, y1 + 3, x2 - 3, y2 - 3)
+            self.canvas.itemconfigure(room_id, state='normal')
+        else:
             room_id = self.canvas.create_rectangle(
                 x1 + 3, y1 + 3, x2 - 3, y2 - 3,  # Slightly inset to show inside room
                 outline='blue', width=1, tags='room', fill='lightblue', stipple='gray25'
             )
-            # Ensure walls are on top
-            self.canvas.tag_lower(room_id)
-            # Raise all walls above the room
-            for item in self.canvas.find_all():
-                tags = self.canvas.gettags(item)
-                if 'wall' in tags:
-                    self.canvas.tag_raise(item)
-            
-            # Add room measurements
-            if self.show_measurements:
-                room_width = abs(x2 - x1)
-                room_height = abs(y2 - y1)
-                width_m = (room_width * 0.1) / 100
-                height_m = (room_height * 0.1) / 100
-                center_x = (x1 + x2) / 2
-                center_y = (y1 + y2) / 2
-                
-                measurement_text = f"{width_m:.2f}m × {height_m:.2f}m"
-                room_measurement_id = self.canvas.create_text(
-                    center_x, center_y,
-                    text=measurement_text,
-                    font=('Arial', 9, 'bold'),
-                    fill='blue',
-                    tags=('room', 'measurement'),
-                    bg='white'
-                )
-                self.measurement_labels.append(room_measurement_id)
-            
-            self.rooms.append((x1, y1, x2, y2, room_id))
-        except Exception as e:
-            # If room rectangle creation fails, at least the walls are created
-            print(f"Room rectangle creation warning: {e}")
-            self.rooms.append((x1, y1, x2, y2, None))
+        # Put the room directly above the grid background, then all walls above it
+        # in one Tk command each
+        self.canvas.tag_raise(room_id, 'grid')
+        self.canvas.tag_raise('wall')
+        
+        # Add room measurements; the label item stays with its room rectangle and is
+        # updated in place, and hidden rather than skipped when measurements are off
+        room_width = abs(x2 - x1)
+        room_height = abs(y2 - y1)
+        width_m = (room_width * 0.1) / 100
+        height_m = (room_height * 0.1) / 100
+        center_x = (x1 + x2) / 2
+        center_y = (y1 + y2) / 2
+        
+        measurement_text = f"{width_m:.2f}m × {height_m:.2f}m"
+        label_ids = self._room_labels.get(room_id)
+        if label_ids is not None:
+            room_measurement_id, bg_id = label_ids
+            self.canvas.coords(room_measurement_id, center_x, center_y)
+            self.canvas.itemconfigure(room_measurement_id, text=measurement_text, state='normal')
+            self.canvas.coords(bg_id, self.canvas.bbox(room_measurement_id))
+        else:
+            room_measurement_id = self.canvas.create_text(
+                center_x, center_y,
+                text=measurement_text,
+                font=('Arial', 9, 'bold'),
+                fill='blue',
+                tags=('room', 'measurement')
+            )
+            # Canvas text has no background option; put a white box right behind the label
+            bg_id = self.canvas.create_rectangle(
+                self.canvas.bbox(room_measurement_id),
+                fill='white', outline='',
+                tags=('room', 'measurement')
+            )
+            self.canvas.tag_lower(bg_id, room_measurement_id)
+            self._room_labels[room_id] = (room_measurement_id, bg_id)
+        self.measurement_labels.extend((room_measurement_id, bg_id))
+        # Hidden items have no bbox, so the box is sized before the state is applied
+        state = 'normal' if self.show_measurements else 'hidden'
+        self.canvas.itemconfigure(room_measurement_id, state=state)
+        self.canvas.itemconfigure(bg_id, state=state)
+        
+        self.rooms.append((x1, y1, x2, y2, room_id))
+        self._track_item(room_id, 'room', (x1, y1, x2, y2), self.rooms[-1])
         
     def add_door(self, x, y):
         """Add a door at the specified position"""
         # Default door width
         door_width = 30
-        door_id = self.canvas.create_arc(
-            x - door_width/2, y - door_width/2,
-            x + door_width/2, y + door_width/2,
-            start=0, extent=90, outline='brown', width=3, tags='door'
-        )
-        # Add resize handles (small squares at corners)
-        handle_size = 5
-        handle1 = self.canvas.create_rectangle(
-            x - door_width/2 - handle_size/2, y - handle_size/2,
-            x - door_width/2 + handle_size/2, y + handle_size/2,
-            fill='red', outline='darkred', width=1, tags=('door', 'handle', 'left')
-        )
-        handle2 = self.canvas.create_rectangle(
-            x + door_width/2 - handle_size/2, y - handle_size/2,
-            x + door_width/2 + handle_size/2, y + handle_size/2,
-            fill='red', outline='darkred', width=1, tags=('door', 'handle', 'right')
-        )
-        self.doors.append((x, y, door_width, door_id, handle1, handle2, 0))  # x, y, width, door_id, handle1, handle2, angle
+        
+        # Snap onto a wall when clicking close to one
+        i, dist = self.nearest_wall(x, y)
+        if i is not None and dist <= self.grid_size / 2:
+            x1, y1, x2, y2, _ = self.walls[i]
+            dx, dy = x2 - x1, y2 - y1
+            t = min(max(((x - x1) * dx + (y - y1) * dy) / max(dx * dx + dy * dy, 1), 0), 1)
+            x, y = x1 + t * dx, y1 + t * dy
+        
+        # Door swing and resize handles are drawn as one image item
+        door_id = self.canvas.create_image(x, y, image=self._door_photo(door_width), tags='door')
+        self._door_by_id[door_id] = len(self.doors)
+        self.doors.append((x, y, door_width, door_id, 0))  # x, y, width, door_id, angle
+        self._index_door(door_id, x, y, door_width)
+        
+    def _index_door(self, door_id, x, y, width):
+        """(Re)register a door's symbol footprint for erasing"""
+        half = (width + 9) / 2
+        self.spatial_index.remove(door_id)
+        self._track_item(door_id, 'door', (x - half, y - half, x + half, y + half))
+        
+    def _door_photo(self, width, handles=False):
+        """PhotoImage of the door symbol for a given width, created once per width and handle state"""
+        photo = self._door_photos.get((width, handles))
+        if photo is None:
+            photo = self._door_photos[width, handles] = ImageTk.PhotoImage(_door_symbol(width, handles))
+        return photo
+        
+    def _set_door_handles(self, index, show):
+        """Swap a door's image between the plain symbol and the one with resize handles"""
+        x, y, width, door_id, angle = self.doors[index]
+        self.canvas.itemconfigure(door_id, image=self._door_photo(width, handles=show))
+        
+    def _on_door_enter(self, event):
+        """Show resize handles on the door under the pointer"""
+        for item in self.canvas.find_withtag('current'):
+            index = self._door_by_id.get(item)
+            if index is not None:
+                self._set_door_handles(index, True)
+        
+    def _on_door_leave(self, event):
+        """Hide the handles again unless that door is being resized"""
+        for item in self.canvas.find_withtag('current'):
+            index = self._door_by_id.get(item)
+            if index is not None and index != self.selected_door:
+                self._set_door_handles(index, False)
         
     def add_window(self, x, y):
         """Add a window at the specified position"""
@@ -783,6 +1264,8 @@ class FloorPlanEditor:
             outline='cyan', width=2, tags='window', fill='lightblue'
         )
         self.windows.append((x, y, window_id))
+        self._track_item(window_id, 'window', (x - window_size/2, y - window_size/2,
+                                               x + window_size/2, y + window_size/2), self.windows[-1])
         
     def add_furniture(self, ftype, x, y):
         """Add furniture at the specified position with image"""
@@ -795,15 +1278,15 @@ class FloorPlanEditor:
         color = fdata["color"]
         
         # Snap to grid
-        x = round(x / self.grid_size) * self.grid_size
-        y = round(y / self.grid_size) * self.grid_size
+        x = self._snap(x)
+        y = self._snap(y)
         
         # Create furniture rectangle with image
         if ftype in self.furniture_images:
             # Use image if available
             furniture_id = self.canvas.create_image(
                 x, y,
-                image=self.furniture_images[ftype],
+                image=self._furniture_photo(ftype, (width, height)),
                 tags='furniture'
             )
         else:
@@ -824,8 +1307,11 @@ class FloorPlanEditor:
             tags='furniture'
         )
         
-        # Store furniture data: (type, x, y, width, height, rotation, main_id)
-        self.furniture.append((ftype, x, y, width, height, 0, furniture_id))
+        # Store furniture data: (type, x, y, width, height, rotation, main_id, text_id)
+        self._furniture_by_id[furniture_id] = self._furniture_by_id[text_id] = len(self.furniture)
+        self.furniture.append((ftype, x, y, width, height, 0, furniture_id, text_id))
+        self.furniture_cols.append(x, y, width, height, furniture_id, self._ftype_to_code[ftype])
+        self._track_item(furniture_id, 'furniture', (x - width/2, y - height/2, x + width/2, y + height/2))
         
     def add_staircase(self, x1, y1, x2, y2):
         """Add a staircase"""
@@ -834,10 +1320,10 @@ class FloorPlanEditor:
         y1, y2 = min(y1, y2), max(y1, y2)
         
         # Snap to grid
-        x1 = round(x1 / self.grid_size) * self.grid_size
-        y1 = round(y1 / self.grid_size) * self.grid_size
-        x2 = round(x2 / self.grid_size) * self.grid_size
-        y2 = round(y2 / self.grid_size) * self.grid_size
+        x1 = self._snap(x1)
+        y1 = self._snap(y1)
+        x2 = self._snap(x2)
+        y2 = self._snap(y2)
         
         # Determine direction (which way stairs go)
         width = abs(x2 - x1)
@@ -850,114 +1336,220 @@ class FloorPlanEditor:
             outline='orange', width=2, tags='staircase', fill='#FFE4B5'
         )
         
-        # Draw step lines to indicate stairs
-        num_steps = max(3, min(10, int(max(width, height) / 15)))
-        if direction == "horizontal":
-            step_width = width / num_steps
-            for i in range(1, num_steps):
-                step_x = x1 + i * step_width
-                self.canvas.create_line(
-                    step_x, y1, step_x, y2,
-                    fill='orange', width=1, tags='staircase'
-                )
-        else:
-            step_height = height / num_steps
-            for i in range(1, num_steps):
-                step_y = y1 + i * step_height
-                self.canvas.create_line(
-                    x1, step_y, x2, step_y,
-                    fill='orange', width=1, tags='staircase'
-                )
-        
-        self.staircases.append((x1, y1, x2, y2, direction, stair_id))
+        # Step lines are only drawn while the staircase is in view
+        stair = (x1, y1, x2, y2, direction, stair_id, [])
+        self.staircases.append(stair)
+        self._track_item(stair_id, 'staircase', (x1, y1, x2, y2), stair)
+        self._sync_step_lines(stair, self._in_view(x1, y1, x2, y2, self._viewport()))
+        
+    def _viewport(self):
+        """Visible canvas region (x1, y1, x2, y2) in canvas coordinates"""
+        return (self._xoff, self._yoff,
+                self._xoff + self.canvas.winfo_width(), self._yoff + self.canvas.winfo_height())
+        
+    @staticmethod
+    def _in_view(x1, y1, x2, y2, view):
+        """Whether a rectangle overlaps the viewport"""
+        return x1 <= view[2] and x2 >= view[0] and y1 <= view[3] and y2 >= view[1]
+        
+    def _sync_step_lines(self, stair, visible):
+        """Create or delete a staircase's step lines to match its visibility"""
+        x1, y1, x2, y2, direction, stair_id, step_line_ids = stair
+        if visible and not step_line_ids:
+            # Create all step lines with one Tcl script instead of one round trip per line
+            canvas = str(self.canvas)
+            script = " ".join(
+                f"[{canvas} create line {sx1} {sy1} {sx2} {sy2} -fill orange -width 1 -tags staircase]"
+                for sx1, sy1, sx2, sy2 in _stair_step_lines(x1, y1, x2, y2, direction)
+            )
+            step_line_ids[:] = [int(i) for i in self.canvas.tk.splitlist(self.canvas.tk.eval(f"list {script}"))]
+        elif not visible and step_line_ids:
+            self.canvas.delete(*step_line_ids)
+            step_line_ids.clear()
+        
+    def refresh_visible(self, event=None):
+        """Draw step lines for staircases entering the viewport and drop them for ones leaving it"""
+        view = self._viewport()
+        if view == self._last_view:
+            return
+        self._last_view = view
+        for stair in self.staircases:
+            self._sync_step_lines(stair, self._in_view(*stair[:4], view))
+        
+    @property
+    def walls_xy(self):
+        """(N, 4) float32 array of wall endpoints (x1, y1, x2, y2)"""
+        return self.wall_cols.rows('x1', 'y1', 'x2', 'y2', dtype=np.float32)
+        
+    def _pick_furniture(self, px, py, tolerance=0):
+        """Index of the topmost furniture whose footprint (grown by tolerance) contains (px, py), or None"""
+        cols = self.furniture_cols
+        mask = ((np.abs(cols['x'] - px) <= cols['w'] / 2 + tolerance) &
+                (np.abs(cols['y'] - py) <= cols['h'] / 2 + tolerance))
+        hits = np.flatnonzero(mask)
+        return int(hits[-1]) if hits.size else None
+        
+    def nearest_wall(self, px, py):
+        """Return (index, distance) of the wall nearest to (px, py), or (None, inf) without walls"""
+        if not self.wall_cols.count:
+            return None, float('inf')
+        x1, y1, x2, y2 = np.ascontiguousarray(self.walls_xy.T, dtype=np.float64)
+        i, dist = _nearest_wall_kernel()(float(px), float(py), x1, y1, x2, y2)
+        return int(i), float(dist)
         
     def erase_at(self, x, y):
         """Erase object at the specified position"""
         tolerance = 10
-        items = self.canvas.find_overlapping(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+        items = self.spatial_index.query((x - tolerance, y - tolerance, x + tolerance, y + tolerance))
+        
+        # The index only tests bounding boxes, so hit-test walls against their actual segments
+        hit, dist = self.nearest_wall(x, y)
+        hit_wall_id = self.walls[hit][4] if hit is not None and dist <= tolerance else None
         
         for item in items:
-            tags = self.canvas.gettags(item)
-            if 'temp' in tags:
-                continue
-                
+            kind, record = self._item_category.get(item, (None, None))
+            
             # Remove from lists
-            if 'wall' in tags:
-                for i, (wx1, wy1, wx2, wy2, wid) in enumerate(self.walls):
-                    if wid == item:
-                        self.walls.pop(i)
-                        break
-            elif 'room' in tags:
-                for i, (rx1, ry1, rx2, ry2, rid) in enumerate(self.rooms):
-                    if rid == item:
-                        self.rooms.pop(i)
-                        break
-            elif 'door' in tags:
-                for i, door_data in enumerate(self.doors):
-                    if len(door_data) >= 4:
-                        door_id = door_data[3]
-                        # Check if item is the door arc or one of the handles
-                        if door_id == item or (len(door_data) > 4 and (door_data[4] == item or door_data[5] == item)):
-                            # Delete door and its handles
-                            self.canvas.delete(door_id)
-                            if len(door_data) > 4:
-                                self.canvas.delete(door_data[4])  # handle1
-                                self.canvas.delete(door_data[5])  # handle2
-                            self.doors.pop(i)
-                            break
-                    elif len(door_data) >= 3 and door_data[2] == item:  # Old format fallback
-                        self.canvas.delete(item)
-                        self.doors.pop(i)
-                        break
-            elif 'window' in tags:
-                for i, (wx, wy, wid) in enumerate(self.windows):
-                    if wid == item:
-                        self.windows.pop(i)
-                        break
-            elif 'staircase' in tags:
-                for i, (sx1, sy1, sx2, sy2, sdir, sid) in enumerate(self.staircases):
-                    if sid == item:
-                        self.staircases.pop(i)
-                        # Delete all staircase-related items
-                        for stair_item in self.canvas.find_withtag('staircase'):
-                            if self.canvas.gettags(stair_item) == ('staircase',):
-                                self.canvas.delete(stair_item)
-                        break
-            elif 'furniture' in tags:
-                # Find and remove furniture
-                for i, (ftype, fx, fy, fw, fh, rot, fid) in enumerate(self.furniture):
-                    if fid == item:
-                        # Delete all furniture items (rectangle and text) at this position
-                        for furn_item in self.canvas.find_withtag('furniture'):
-                            item_coords = self.canvas.coords(furn_item)
-                            if len(item_coords) >= 2:
-                                if len(item_coords) >= 4:
-                                    item_x = (item_coords[0] + item_coords[2]) / 2
-                                    item_y = (item_coords[1] + item_coords[3]) / 2
-                                else:
-                                    item_x, item_y = item_coords[0], item_coords[1]
-                                if abs(item_x - fx) < 5 and abs(item_y - fy) < 5:
-                                    self.canvas.delete(furn_item)
-                        self.furniture.pop(i)
-                        return
+            if kind == 'wall':
+                if item != hit_wall_id:
+                    continue  # Only the bounding box overlaps
+                i = self.wall_cols.find('id', item)
+                self.walls.pop(i)
+                self.wall_cols.pop(i)
+                label_ids = self._wall_labels.pop(item, ())
+                self.canvas.delete(*label_ids)
+                self._drop_measurement_labels(label_ids)
+                self._forget_item(item)
+                self._recycle_item('wall', item)
+                continue
+            elif kind == 'room':
+                self.rooms.remove(record)
+                self._forget_item(item)
+                self._recycle_item('room', item)
+                # The label is parked with the rectangle and reused with it; add_room lists
+                # it in measurement_labels again on reuse
+                label_ids = self._room_labels.get(item, ())
+                for label_id in label_ids:
+                    self.canvas.itemconfigure(label_id, state='hidden')
+                self._drop_measurement_labels(label_ids)
+                continue
+            elif kind == 'door':
+                self.doors.pop(self._door_by_id[item])
+                self._reindex_doors()
+            elif kind == 'window':
+                self.windows.remove(record)
+            elif kind == 'staircase':
+                self.staircases.remove(record)
+                # Delete the rectangle and its own step lines in one call
+                sx1, sy1, sx2, sy2, sdir, sid, step_line_ids = record
+                self._forget_item(sid)
+                self.canvas.delete(sid, *step_line_ids)
+                continue
+            elif kind == 'furniture':
+                i = self._furniture_by_id[item]
+                ftype, fx, fy, fw, fh, rot, fid, tid = self.furniture[i]
+                # Delete the furniture item and its label
+                self.canvas.delete(fid, tid)
+                self.furniture.pop(i)
+                self.furniture_cols.pop(i)
+                self._reindex_furniture()
+                self._forget_item(fid)
+                return
             
+            self._forget_item(item)
             self.canvas.delete(item)
             
+    def _track_item(self, item, kind, bbox, record=None):
+        """Register a canvas item's category and bounding box for erasing.
+        
+        Rooms, windows and staircases keep their record here; walls, doors and
+        furniture are looked up through their own index maps.
+        """
+        self._item_category[item] = (kind, record)
+        self.spatial_index.insert(item, bbox)
+        
+    def _forget_item(self, item):
+        """Drop a canvas item from the category map and the spatial index"""
+        self._item_category.pop(item, None)
+        self.spatial_index.remove(item)
+        
+    def _recycle_item(self, kind, item):
+        """Hide an erased item off-screen and keep it for the next add of the same kind"""
+        self.canvas.coords(item, -1000, -1000, -1000, -1000)
+        self.canvas.itemconfigure(item, state='hidden')
+        self._item_pools[kind].append(item)
+        
+    def _drop_measurement_labels(self, label_ids):
+        """Stop listing the given label items in measurement_labels"""
+        if label_ids:
+            self.measurement_labels = [i for i in self.measurement_labels if i not in label_ids]
+        
+    def _reuse_item(self, kind):
+        """A parked item of the given kind, or None when the pool is empty"""
+        pool = self._item_pools[kind]
+        return pool.pop() if pool else None
+        
+    def _snap(self, v):
+        """Snap a canvas coordinate to the nearest grid line using integer math"""
+        g = self.grid_size
+        if self._grid_mask is not None:
+            return (int(v) + g // 2) & self._grid_mask
+        return (int(v) + g // 2) // g * g
+        
+    def _reindex_furniture(self):
+        """Rebuild the canvas item -> furniture index map after a removal"""
+        self._furniture_by_id = {}
+        for i, f in enumerate(self.furniture):
+            self._furniture_by_id[f[6]] = self._furniture_by_id[f[7]] = i
+        
+    def _reindex_doors(self):
+        """Rebuild the door item -> door index map after a removal"""
+        self._door_by_id = {door_data[3]: i for i, door_data in enumerate(self.doors)}
+        
     def clear_all(self):
         """Clear all objects from canvas"""
         if messagebox.askyesno("Clear All", "Are you sure you want to clear everything?"):
             self.canvas.delete("all")
             self.walls = []
+            self.wall_cols.clear()
             self.rooms = []
             self.doors = []
             self.windows = []
             self.staircases = []
             self.furniture = []
+            self.furniture_cols.clear()
+            self._furniture_by_id = {}
+            self._door_by_id = {}
+            self.spatial_index.clear()
+            self._item_category = {}
+            self._item_pools = {'wall': [], 'room': []}
+            self._wall_labels = {}
+            self._room_labels = {}
             self.measurement_labels = []
-            self.canvas_image = Image.new('RGB', (self.canvas_width, self.canvas_height), 'white')
-            self.canvas_draw = ImageDraw.Draw(self.canvas_image)
             self.draw_grid()
             
+    def _rasterize_walls(self, width=6):
+        """Rasterize all walls into a white grayscale ('L') image, one vectorized distance mask per wall"""
+        img = np.full((self.canvas_height, self.canvas_width), 255, np.uint8)
+        half = width / 2
+        for x1, y1, x2, y2 in self.walls_xy.tolist():
+            # Only look at the wall's bounding box, padded by half the width
+            c0 = max(int(min(x1, x2) - half), 0)
+            c1 = min(int(max(x1, x2) + half) + 1, self.canvas_width)
+            r0 = max(int(min(y1, y2) - half), 0)
+            r1 = min(int(max(y1, y2) + half) + 1, self.canvas_height)
+            if c0 >= c1 or r0 >= r1:
+                continue
+            
+            # Distance of every pixel in the box to the segment
+            ys, xs = np.ogrid[r0:r1, c0:c1]
+            dx, dy = x2 - x1, y2 - y1
+            t = np.clip(((xs - x1) * dx + (ys - y1) * dy) / max(dx * dx + dy * dy, 1), 0, 1)
+            dist2 = (xs - x1 - t * dx) ** 2 + (ys - y1 - t * dy) ** 2
+            img[r0:r1, c0:c1][dist2 <= half * half] = 0
+        
+        return Image.fromarray(img)
+        
     def save_floor_plan(self):
         """Save the floor plan as an image"""
         if not self.walls:
@@ -972,64 +1564,58 @@ class FloorPlanEditor:
         
         if file_path:
             try:
-                # Recreate image with all walls
-                img = Image.new('RGB', (self.canvas_width, self.canvas_height), 'white')
-                draw = ImageDraw.Draw(img)
-                
-                # Draw walls
-                for x1, y1, x2, y2, _ in self.walls:
-                    draw.line([(x1, y1), (x2, y2)], fill='black', width=6)
+                # Recreate image with all walls, then draw the rest with batched cv2 calls
+                # straight into the RGB buffer (colors are given in RGB order)
+                buf = np.array(self._rasterize_walls().convert('RGB'))
+                rgb = ImageColor.getrgb
                 
                 # Draw rooms (as outlines)
-                for x1, y1, x2, y2, _ in self.rooms:
-                    draw.rectangle([(x1, y1), (x2, y2)], outline='blue', width=2)
+                if self.rooms:
+                    cv2.polylines(buf, _rect_polys([r[:4] for r in self.rooms]), True, rgb('blue'), 2)
                 
                 # Draw doors
                 for door_data in self.doors:
-                    if len(door_data) >= 3:
-                        x, y = door_data[0], door_data[1]
-                        door_width = door_data[2] if len(door_data) > 2 else 20
-                        draw.arc(
-                            [x - door_width/2, y - door_width/2, x + door_width/2, y + door_width/2],
-                            start=0, end=90, fill='brown', width=3
-                        )
+                    x, y, door_width = door_data[0], door_data[1], door_data[2]
+                    r = int(round(door_width / 2))
+                    cv2.ellipse(buf, (int(round(x)), int(round(y))), (r, r), 0, 0, 90, rgb('brown'), 3)
                 
                 # Draw windows
-                for x, y, _ in self.windows:
+                if self.windows:
                     window_size = 30
-                    draw.rectangle(
-                        [x - window_size/2, y - window_size/2, x + window_size/2, y + window_size/2],
-                        outline='cyan', fill='lightblue', width=2
-                    )
+                    polys = _rect_polys([(x - window_size/2, y - window_size/2, x + window_size/2, y + window_size/2)
+                                         for x, y, _ in self.windows])
+                    cv2.fillPoly(buf, polys, rgb('lightblue'))
+                    cv2.polylines(buf, polys, True, rgb('cyan'), 2)
                 
                 # Draw staircases
-                for x1, y1, x2, y2, direction, _ in self.staircases:
-                    draw.rectangle([(x1, y1), (x2, y2)], outline='orange', fill='#FFE4B5', width=2)
-                    # Draw step lines
-                    width = abs(x2 - x1)
-                    height = abs(y2 - y1)
-                    num_steps = max(3, min(10, int(max(width, height) / 15)))
-                    if direction == "horizontal":
-                        step_width = width / num_steps
-                        for i in range(1, num_steps):
-                            step_x = x1 + i * step_width
-                            draw.line([(step_x, y1), (step_x, y2)], fill='orange', width=1)
-                    else:
-                        step_height = height / num_steps
-                        for i in range(1, num_steps):
-                            step_y = y1 + i * step_height
-                            draw.line([(x1, step_y), (x2, step_y)], fill='orange', width=1)
+                if self.staircases:
+                    polys = _rect_polys([s[:4] for s in self.staircases])
+                    cv2.fillPoly(buf, polys, rgb('#FFE4B5'))
+                    cv2.polylines(buf, polys, True, rgb('orange'), 2)
+                    # Draw step lines, all staircases in one call
+                    steps = [seg for s in self.staircases for seg in _stair_step_lines(*s[:5])]
+                    if steps:
+                        lines = np.rint(np.asarray(steps).reshape(-1, 2, 2)).astype(np.int32)
+                        cv2.polylines(buf, lines, False, rgb('orange'), 1)
                 
-                # Draw furniture
-                for ftype, fx, fy, fw, fh, rot, fid in self.furniture:
-                    fdata = self.furniture_types[ftype]
-                    color = fdata["color"]
-                    draw.rectangle(
-                        [(fx - fw/2, fy - fh/2), (fx + fw/2, fy + fh/2)],
-                        outline='black', fill=color, width=2
-                    )
+                # Draw furniture, one fill call per color and one outline call for all
+                if self.furniture:
+                    by_color = {}
+                    for ftype, fx, fy, fw, fh, rot, fid, tid in self.furniture:
+                        color = self.furniture_types[ftype]["color"]
+                        by_color.setdefault(color, []).append((fx - fw/2, fy - fh/2, fx + fw/2, fy + fh/2))
+                    for color, rects in by_color.items():
+                        cv2.fillPoly(buf, _rect_polys(rects), rgb(color))
+                    outlines = _rect_polys([(fx - fw/2, fy - fh/2, fx + fw/2, fy + fh/2)
+                                            for _, fx, fy, fw, fh, *_ in self.furniture])
+                    cv2.polylines(buf, outlines, True, (0, 0, 0), 2)
                 
-                img.save(file_path)
+                img = Image.fromarray(buf)
+                # Favor write speed over file size
+                if os.path.splitext(file_path)[1].lower() in ('.jpg', '.jpeg'):
+                    img.save(file_path, quality=85, optimize=False)
+                else:
+                    img.save(file_path, optimize=False, compress_level=1)
                 messagebox.showinfo("Success", f"Floor plan saved to:\n{file_path}")
                 
             except Exception as e:
@@ -1042,16 +1628,10 @@ class FloorPlanEditor:
             return
             
         # Save to temporary file first
-        temp_path = "temp_floor_plan.png"
+        temp_path = "temp_floor_plan.bmp"  # Re-read immediately, so skip compression entirely
         try:
-            # Create image
-            img = Image.new('RGB', (self.canvas_width, self.canvas_height), 'white')
-            draw = ImageDraw.Draw(img)
-            
-            # Draw only walls (for 3D generation)
-            for x1, y1, x2, y2, _ in self.walls:
-                draw.line([(x1, y1), (x2, y2)], fill='black', width=6)
-            
+            # Create image with only walls (for 3D generation)
+            img = self._rasterize_walls()
             img.save(temp_path)
             
             # Import and use the 3D generator
@@ -1067,8 +1647,44 @@ class FloorPlanEditor:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate 3D model:\n{str(e)}")
             
-    def open_3d_viewer(self, floor_plan_path, doors=None, windows=None, staircases=None, furniture=None, img_width=1000, img_height=700):
-        """Open 3D viewer in a new window with doors, windows, staircases, and furniture"""
+    def _show_static_3d(self):
+        """Render the 3D figure off-screen with Agg and show it as an image"""
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        
+        agg = FigureCanvasAgg(self._3d_ax.figure)
+        agg.draw()
+        buf, size = agg.print_to_buffer()
+        photo = ImageTk.PhotoImage(Image.frombuffer('RGBA', size, buf, 'raw', 'RGBA', 0, 1))
+        self._3d_label.configure(image=photo)
+        self._3d_label.image = photo  # Keep a reference so Tk doesn't lose the image
+        
+    def _enable_3d_rotation(self):
+        """Swap the static 3D image for an interactive, rotatable canvas"""
+        if self._3d_canvas is not None:
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self._3d_label.destroy()
+        self._3d_rotate_button.configure(state=tk.DISABLED)
+        canvas = self._3d_canvas = FigureCanvasTkAgg(self._3d_ax.figure, self._3d_window)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+    def _open_3d_in_pyvista(self):
+        """Open the last 3D render in a GPU-accelerated pyvista window"""
+        try:
+            _show_pyvista(self._3d_meshes, "3D House Model", self.root)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open pyvista viewer:\n{str(e)}")
+        
+    def open_3d_viewer(self, floor_plan_path, doors=None, windows=None, staircases=None, furniture=None, img_width=1000, img_height=700,
+                       translucent=False):
+        """
+        Open 3D viewer in a new window with doors, windows, staircases, and furniture
+        
+        Walls, stairs, furniture and door/window frames are drawn opaque, which
+        skips alpha blending; pass translucent=True to see through them instead.
+        """
         if doors is None:
             doors = []
         if windows is None:
@@ -1077,19 +1693,14 @@ class FloorPlanEditor:
             staircases = []
         if furniture is None:
             furniture = []
-        # Create a new window for 3D visualization
-        viewer_window = tk.Toplevel(self.root)
-        viewer_window.title("3D House Model")
-        viewer_window.geometry("1000x800")
-        
         # Import here to avoid circular imports
         from floor_plan_to_3d import FloorPlanTo3D
-        import matplotlib.pyplot as plt
+        from matplotlib.figure import Figure
         import numpy as np
         from mpl_toolkits.mplot3d import Axes3D
         from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         
+        viewer_window = None
         try:
             # Create converter
             converter = FloorPlanTo3D(wall_height=3.0, wall_thickness=0.2)
@@ -1099,22 +1710,24 @@ class FloorPlanEditor:
             walls = converter.detect_walls(image)
             normalized_walls, scale = converter.normalize_coordinates(walls, image.shape)
             
-            # Create 3D visualization
-            fig = plt.figure(figsize=(10, 8))
-            ax = fig.add_subplot(111, projection='3d')
+            # Collapse collinear fragments before extrusion
+            normalized_walls = converter.merge_walls(normalized_walls, converter.wall_thickness)
+            
+            # Geometry is collected as (faces, style) batches and handed to a renderer at the end
+            meshes = []
+            
+            def solid(alpha):
+                """Alpha for faces that are opaque unless the translucent view was asked for"""
+                return alpha if translucent else 1.0
             
             # Create floor
             floor = converter.create_3d_floor(image.shape, scale)
-            floor_face = Poly3DCollection([floor], alpha=0.3, facecolor='gray', edgecolor='black')
-            ax.add_collection3d(floor_face)
+            meshes.append(([floor], dict(alpha=0.3, facecolor='gray', edgecolor='black')))
             
-            # Create walls
-            for x1, y1, x2, y2 in normalized_walls:
-                wall_faces = converter.create_3d_wall(x1, y1, x2, y2, 3.0, 0.2)
-                for face in wall_faces:
-                    wall_poly = Poly3DCollection([face], alpha=0.7, facecolor='beige', 
-                                                edgecolor='brown', linewidths=0.5)
-                    ax.add_collection3d(wall_poly)
+            # Create walls, all faces built in one batch and drawn as one collection
+            wall_faces = converter.create_3d_walls(normalized_walls, 3.0, 0.2, bottom=False)
+            if len(wall_faces):
+                meshes.append((wall_faces, dict(alpha=solid(0.7), facecolor='beige', edgecolor='brown', linewidths=0.5)))
             
             # Convert scale for doors, windows, staircases - use same scale as walls
             # The scale from normalize_coordinates is already applied to walls
@@ -1122,66 +1735,47 @@ class FloorPlanEditor:
             estimated_house_width = 15.0  # meters
             img_scale = estimated_house_width / max(img_width, img_height)
             
+            # Door/window pixel positions scaled in one pass, as float32 (N, 2) arrays
+            door_xy = np.array([d[:2] for d in doors], np.float32).reshape(-1, 2) * np.float32(img_scale)
+            window_xy = np.array([w[:2] for w in windows], np.float32).reshape(-1, 2) * np.float32(img_scale)
+            
             # Helper function to find nearest wall and position door/window on it
-            def find_nearest_wall_point(px, py, walls_list):
+            # Wall starts, unit directions, lengths and normals, computed once for all doors/windows
+            wall_array = np.asarray(normalized_walls, dtype=np.float32).reshape(-1, 4)
+            wall_dirs = wall_array[:, 2:4] - wall_array[:, 0:2]
+            wall_lens = np.linalg.norm(wall_dirs, axis=1)
+            keep = wall_lens > 0  # Zero-length walls have no direction
+            wall_starts = wall_array[keep, 0:2]
+            wall_lens = wall_lens[keep]
+            wall_dirs = wall_dirs[keep] / wall_lens[:, None]
+            # Wall normal (perpendicular, pointing away from wall center)
+            wall_normals = np.stack([-wall_dirs[:, 1], wall_dirs[:, 0]], axis=1)
+            wall_starts = np.ascontiguousarray(wall_starts)
+            nearest_on_walls = _nearest_on_walls_kernel()
+            
+            def find_nearest_wall_point(px, py):
                 """Find the nearest point on any wall to the given point"""
-                min_dist = float('inf')
-                nearest_point = None
-                wall_normal = None
-                
-                for wx1, wy1, wx2, wy2 in walls_list:
-                    # Vector along wall
-                    wall_dx = wx2 - wx1
-                    wall_dy = wy2 - wy1
-                    wall_len = np.sqrt(wall_dx**2 + wall_dy**2)
-                    
-                    if wall_len == 0:
-                        continue
-                    
-                    # Normalize wall direction
-                    wall_dx_norm = wall_dx / wall_len
-                    wall_dy_norm = wall_dy / wall_len
-                    
-                    # Vector from wall start to point
-                    to_point_dx = px - wx1
-                    to_point_dy = py - wy1
-                    
-                    # Project onto wall direction
-                    t = to_point_dx * wall_dx_norm + to_point_dy * wall_dy_norm
-                    t = max(0, min(wall_len, t))  # Clamp to wall segment
-                    
-                    # Nearest point on wall
-                    nearest_x = wx1 + t * wall_dx_norm
-                    nearest_y = wy1 + t * wall_dy_norm
-                    
-                    # Distance to this point
-                    dist = np.sqrt((px - nearest_x)**2 + (py - nearest_y)**2)
-                    
-                    if dist < min_dist:
-                        min_dist = dist
-                        nearest_point = (nearest_x, nearest_y)
-                        # Wall normal (perpendicular, pointing away from wall center)
-                        wall_normal = (-wall_dy_norm, wall_dx_norm)
+                if not len(wall_starts):
+                    return None, None
                 
-                return nearest_point, wall_normal
+                # Project the point onto every wall, clamped to the segments
+                i, nearest_x, nearest_y = nearest_on_walls(np.float32(px), np.float32(py),
+                                                           wall_starts, wall_dirs, wall_lens)
+                return (float(nearest_x), float(nearest_y)), (float(wall_normals[i, 0]), float(wall_normals[i, 1]))
+            
+            # Door/window/step faces are collected per style and added as one collection each
+            door_openings, door_panels = [], []
+            window_panes, window_frames = [], []
+            stair_steps = []
             
             # Create doors (3D openings in walls with door panels)
             import math
-            for door_data in doors:
+            for door_data, (door_x_norm, door_y_norm) in zip(doors, door_xy.tolist()):
                 # Handle both old format (x, y, id) and new format (x, y, width, id, ...)
-                if len(door_data) >= 3:
-                    door_x_pixel, door_y_pixel = door_data[0], door_data[1]
-                    door_width_pixels = door_data[2] if len(door_data) > 2 else 30
-                else:
-                    door_x_pixel, door_y_pixel = door_data[0], door_data[1]
-                    door_width_pixels = 30
-                
-                # Convert pixel coordinates to normalized coordinates (same as walls)
-                door_x_norm = door_x_pixel * img_scale
-                door_y_norm = door_y_pixel * img_scale
+                door_width_pixels = door_data[2] if len(door_data) >= 3 else 30
                 
                 # Find nearest wall and position door on it
-                nearest_point, wall_normal = find_nearest_wall_point(door_x_norm, door_y_norm, normalized_walls)
+                nearest_point, wall_normal = find_nearest_wall_point(door_x_norm, door_y_norm)
                 
                 if nearest_point is None:
                     continue
@@ -1206,9 +1800,8 @@ class FloorPlanEditor:
                     [door_x + door_width/2 + offset_x, door_y + offset_y, 0],
                     [door_x + door_width/2 + offset_x, door_y + offset_y, door_height],
                     [door_x - door_width/2 + offset_x, door_y + offset_y, door_height]
-                ])
-                door_opening_poly = Poly3DCollection([door_opening], alpha=0.3, facecolor='#654321', edgecolor='#654321')
-                ax.add_collection3d(door_opening_poly)
+                ], dtype=np.float32)
+                door_openings.append(door_opening)
                 
                 # Create door panel (showing as partially open at 45 degrees)
                 door_angle = 45  # degrees
@@ -1227,23 +1820,14 @@ class FloorPlanEditor:
                     [panel_right_x, panel_right_y, 0],
                     [panel_right_x, panel_right_y, door_height],
                     [panel_left_x, panel_left_y, door_height]
-                ])
-                door_panel_poly = Poly3DCollection([door_panel], alpha=0.9, facecolor='#8B4513', edgecolor='#654321', linewidths=1)
-                ax.add_collection3d(door_panel_poly)
+                ], dtype=np.float32)
+                door_panels.append(door_panel)
             
             # Create windows (3D openings in walls)
-            for window_data in windows:
-                if len(window_data) >= 2:
-                    window_x_pixel, window_y_pixel = window_data[0], window_data[1]
-                else:
-                    continue
-                
-                # Convert pixel coordinates to normalized coordinates
-                window_x_norm = window_x_pixel * img_scale
-                window_y_norm = window_y_pixel * img_scale
+            for window_x_norm, window_y_norm in window_xy.tolist():
                 
                 # Find nearest wall and position window on it
-                nearest_point, wall_normal = find_nearest_wall_point(window_x_norm, window_y_norm, normalized_walls)
+                nearest_point, wall_normal = find_nearest_wall_point(window_x_norm, window_y_norm)
                 
                 if nearest_point is None:
                     continue
@@ -1268,9 +1852,8 @@ class FloorPlanEditor:
                     [window_x + window_width/2 + offset_x, window_y + offset_y, window_bottom],
                     [window_x + window_width/2 + offset_x, window_y + offset_y, window_bottom + window_height],
                     [window_x - window_width/2 + offset_x, window_y + offset_y, window_bottom + window_height]
-                ])
-                window_poly = Poly3DCollection([window_vertices], alpha=0.5, facecolor='lightblue', edgecolor='blue', linewidths=1)
-                ax.add_collection3d(window_poly)
+                ], dtype=np.float32)
+                window_panes.append(window_vertices)
                 
                 # Add window frame (slightly raised from wall)
                 frame_thickness = 0.05
@@ -1285,12 +1868,11 @@ class FloorPlanEditor:
                     [window_x + window_width/2 + frame_offset_x, window_y + frame_offset_y, window_bottom],
                     [window_x + window_width/2 + frame_offset_x, window_y + frame_offset_y, window_bottom + window_height],
                     [window_x - window_width/2 + frame_offset_x, window_y + frame_offset_y, window_bottom + window_height]
-                ])
-                window_frame_poly = Poly3DCollection([window_frame], alpha=0.7, facecolor='white', edgecolor='gray', linewidths=1)
-                ax.add_collection3d(window_frame_poly)
+                ], dtype=np.float32)
+                window_frames.append(window_frame)
             
             # Create staircases (3D stepped structure)
-            for stair_x1, stair_y1, stair_x2, stair_y2, direction, _ in staircases:
+            for stair_x1, stair_y1, stair_x2, stair_y2, direction, *_ in staircases:
                 # Convert to scaled coordinates
                 sx1 = stair_x1 * img_scale
                 sy1 = stair_y1 * img_scale
@@ -1303,108 +1885,99 @@ class FloorPlanEditor:
                 num_steps = max(3, min(15, int(max(stair_width, stair_depth) / 0.3)))
                 step_height = stair_height / num_steps
                 
+                # All steps at once: each step is a box one step further along and one step higher
                 if direction == "horizontal":
                     step_width = stair_width / num_steps
-                    for i in range(num_steps):
-                        step_x = sx1 + i * step_width
-                        step_z = i * step_height
-                        step_vertices = np.array([
-                            [step_x, sy1, step_z],
-                            [step_x + step_width, sy1, step_z],
-                            [step_x + step_width, sy2, step_z],
-                            [step_x, sy2, step_z],
-                            [step_x, sy1, step_z + step_height],
-                            [step_x + step_width, sy1, step_z + step_height],
-                            [step_x + step_width, sy2, step_z + step_height],
-                            [step_x, sy2, step_z + step_height]
-                        ])
-                        # Create step faces
-                        step_faces = [
-                            [step_vertices[0], step_vertices[1], step_vertices[2], step_vertices[3]],  # Bottom
-                            [step_vertices[4], step_vertices[5], step_vertices[6], step_vertices[7]],  # Top
-                            [step_vertices[0], step_vertices[1], step_vertices[5], step_vertices[4]],  # Front
-                            [step_vertices[2], step_vertices[3], step_vertices[7], step_vertices[6]],  # Back
-                        ]
-                        for face in step_faces:
-                            step_poly = Poly3DCollection([face], alpha=0.8, facecolor='#FFE4B5', edgecolor='orange')
-                            ax.add_collection3d(step_poly)
+                    step_vertices = _build_steps((sx1, sy1, 0), (step_width, 0, step_height),
+                                                 (step_width, stair_depth, step_height), num_steps)
                 else:  # vertical
                     step_depth = stair_depth / num_steps
-                    for i in range(num_steps):
-                        step_y = sy1 + i * step_depth
-                        step_z = i * step_height
-                        step_vertices = np.array([
-                            [sx1, step_y, step_z],
-                            [sx2, step_y, step_z],
-                            [sx2, step_y + step_depth, step_z],
-                            [sx1, step_y + step_depth, step_z],
-                            [sx1, step_y, step_z + step_height],
-                            [sx2, step_y, step_z + step_height],
-                            [sx2, step_y + step_depth, step_z + step_height],
-                            [sx1, step_y + step_depth, step_z + step_height]
-                        ])
-                        # Create step faces
-                        step_faces = [
-                            [step_vertices[0], step_vertices[1], step_vertices[2], step_vertices[3]],  # Bottom
-                            [step_vertices[4], step_vertices[5], step_vertices[6], step_vertices[7]],  # Top
-                            [step_vertices[0], step_vertices[1], step_vertices[5], step_vertices[4]],  # Front
-                            [step_vertices[2], step_vertices[3], step_vertices[7], step_vertices[6]],  # Back
-                        ]
-                        for face in step_faces:
-                            step_poly = Poly3DCollection([face], alpha=0.8, facecolor='#FFE4B5', edgecolor='orange')
-                            ax.add_collection3d(step_poly)
+                    step_vertices = _build_steps((sx1, sy1, 0), (0, step_depth, step_height),
+                                                 (stair_width, step_depth, step_height), num_steps)
+                
+                # Top, front and back faces of every step; bottoms are culled since the view is from above
+                stair_steps.append(step_vertices[:, _STEP_FACE_IDX].reshape(-1, 4, 3))
             
-            # Create furniture (3D objects on floor)
-            furniture_heights = {
-                "sofa": 0.4, "dining_table": 0.75, "bed": 0.5, "chair": 0.4,
-                "desk": 0.75, "tv": 0.6, "refrigerator": 1.8, "cabinet": 0.9,
-                "bookshelf": 1.5, "table": 0.75, "wardrobe": 2.0, "bathtub": 0.5
-            }
+            for faces, style in (
+                (door_openings, dict(alpha=0.3, facecolor='#654321', edgecolor='#654321')),
+                (door_panels, dict(alpha=solid(0.9), facecolor='#8B4513', edgecolor='#654321', linewidths=1)),
+                (window_panes, dict(alpha=0.5, facecolor='lightblue', edgecolor='blue', linewidths=1)),
+                (window_frames, dict(alpha=solid(0.7), facecolor='white', edgecolor='gray', linewidths=1)),
+                (stair_steps, dict(alpha=solid(0.8), facecolor='#FFE4B5', edgecolor='orange')),
+            ):
+                if faces:
+                    # Single quads and per-staircase (k, 4, 3) face stacks alike
+                    meshes.append((np.concatenate([np.reshape(f, (-1, 4, 3)) for f in faces]), style))
             
-            for ftype, fx, fy, fw, fh, rot, fid in furniture:
-                if ftype not in self.furniture_types:
-                    continue
-                
-                # Convert pixel coordinates to normalized coordinates
-                furniture_x = fx * img_scale
-                furniture_y = fy * img_scale
-                furniture_width = fw * img_scale * 0.03  # Convert to meters
-                furniture_depth = fh * img_scale * 0.03  # Convert to meters
-                furniture_height = furniture_heights.get(ftype, 0.5)  # Default height
-                
-                # Create 3D furniture box
-                f_x1 = furniture_x - furniture_width/2
-                f_x2 = furniture_x + furniture_width/2
-                f_y1 = furniture_y - furniture_depth/2
-                f_y2 = furniture_y + furniture_depth/2
-                
-                furniture_vertices = np.array([
-                    [f_x1, f_y1, 0],           # Bottom corners
-                    [f_x2, f_y1, 0],
-                    [f_x2, f_y2, 0],
-                    [f_x1, f_y2, 0],
-                    [f_x1, f_y1, furniture_height],  # Top corners
-                    [f_x2, f_y1, furniture_height],
-                    [f_x2, f_y2, furniture_height],
-                    [f_x1, f_y2, furniture_height]
-                ])
-                
-                # Create furniture faces
-                furniture_faces = [
-                    [furniture_vertices[0], furniture_vertices[1], furniture_vertices[2], furniture_vertices[3]],  # Bottom
-                    [furniture_vertices[4], furniture_vertices[5], furniture_vertices[6], furniture_vertices[7]],  # Top
-                    [furniture_vertices[0], furniture_vertices[1], furniture_vertices[5], furniture_vertices[4]],  # Front
-                    [furniture_vertices[2], furniture_vertices[3], furniture_vertices[7], furniture_vertices[6]],  # Back
-                    [furniture_vertices[0], furniture_vertices[3], furniture_vertices[7], furniture_vertices[4]],  # Left
-                    [furniture_vertices[1], furniture_vertices[2], furniture_vertices[6], furniture_vertices[5]],  # Right
-                ]
+            # Create furniture (3D objects on floor): x, y, width, depth and type code, one row each
+            if furniture is self.furniture:
+                placed = self.furniture_cols.rows('x', 'y', 'w', 'h', 'type', dtype=np.float32)
+            else:
+                placed = np.array([(*f[1:5], self._ftype_to_code[f[0]]) for f in furniture
+                                   if f[0] in self._ftype_to_code], dtype=np.float32).reshape(-1, 5)
+            if len(placed):
+                codes = placed[:, 4].astype(np.intp)
+                fxywh = placed[:, :4]
+                centers = np.zeros((len(placed), 3), dtype=np.float32)
+                centers[:, :2] = fxywh[:, :2] * img_scale  # Convert pixel coordinates to normalized coordinates
+                sizes = np.empty((len(placed), 3), dtype=np.float32)
+                sizes[:, :2] = fxywh[:, 2:4] * img_scale * 0.03  # Convert to meters
+                sizes[:, 2] = self._height_table[codes]
                 
-                fdata = self.furniture_types[ftype]
-                furniture_color = fdata["color"]
+                # (N, 8, 3) corners, then the 5 visible faces (N, 5, 4, 3) flattened to (5N, 4, 3)
+                furniture_vertices = centers[:, None, :] + _BOX_OFFSETS[None] * sizes[:, None, :]
+                furniture_faces_all = furniture_vertices[:, _BOX_FACE_IDX_NO_BOTTOM].reshape(-1, 4, 3)
+                furniture_colors = np.repeat(self._color_table[codes], len(_BOX_FACE_IDX_NO_BOTTOM)).tolist()
                 
-                for face in furniture_faces:
-                    furn_poly = Poly3DCollection([face], alpha=0.8, facecolor=furniture_color, edgecolor='black', linewidths=0.5)
-                    ax.add_collection3d(furn_poly)
+                meshes.append((furniture_faces_all, dict(alpha=solid(0.8), facecolors=furniture_colors,
+                                                         edgecolor='black', linewidths=0.5)))
+            
+            self._3d_meshes = meshes
+            
+            # Reuse the 3D window, figure and canvas while the window is still open
+            viewer_window = self._3d_window
+            reuse = viewer_window is not None and viewer_window.winfo_exists()
+            if not reuse:
+                # Create a new window for 3D visualization: a static image until the user asks to rotate
+                viewer_window = self._3d_window = tk.Toplevel(self.root)
+                viewer_window.title("3D House Model")
+                viewer_window.geometry("1000x840")
+                self._3d_canvas = None
+                self._3d_rotate_button = tk.Button(
+                    viewer_window,
+                    text="🔄 Rotate",
+                    command=self._enable_3d_rotation,
+                    font=('Arial', 10, 'bold'),
+                    relief=tk.RAISED,
+                    cursor='hand2',
+                    padx=10,
+                    pady=2
+                )
+                self._3d_rotate_button.pack(side=tk.TOP, anchor=tk.W, padx=5, pady=2)
+                if _HAVE_PYVISTA:
+                    tk.Button(
+                        viewer_window,
+                        text="🖥 Open in pyvista",
+                        command=self._open_3d_in_pyvista,
+                        font=('Arial', 10, 'bold'),
+                        relief=tk.RAISED,
+                        cursor='hand2',
+                        padx=10,
+                        pady=2
+                    ).pack(side=tk.TOP, anchor=tk.W, padx=5, pady=2)
+                self._3d_label = tk.Label(viewer_window)
+                self._3d_label.pack(fill=tk.BOTH, expand=True)
+            viewer_window.lift()
+            
+            # Create 3D visualization
+            if reuse:
+                ax = self._3d_ax
+                ax.clear()
+            else:
+                fig = Figure(figsize=(10, 8))
+                ax = self._3d_ax = fig.add_subplot(111, projection='3d')
+            for faces, style in meshes:
+                ax.add_collection3d(Poly3DCollection(faces, **style))
             
             # Set axis properties
             ax.set_xlabel('X (meters)')
@@ -1413,26 +1986,21 @@ class FloorPlanEditor:
             ax.set_title('3D House Model from Floor Plan')
             
             # Set equal aspect ratio
-            max_range = max([ax.get_xlim()[1] - ax.get_xlim()[0],
-                            ax.get_ylim()[1] - ax.get_ylim()[0],
-                            ax.get_zlim()[1] - ax.get_zlim()[0]])
-            mid_x = (ax.get_xlim()[0] + ax.get_xlim()[1]) / 2
-            mid_y = (ax.get_ylim()[0] + ax.get_ylim()[1]) / 2
-            mid_z = (ax.get_zlim()[0] + ax.get_zlim()[1]) / 2
-            ax.set_xlim(mid_x - max_range/2, mid_x + max_range/2)
-            ax.set_ylim(mid_y - max_range/2, mid_y + max_range/2)
-            ax.set_zlim(mid_z - max_range/2, mid_z + max_range/2)
+            converter.set_equal_limits(ax, [faces for faces, _ in meshes])
             
             # Display in window
-            canvas = FigureCanvasTkAgg(fig, viewer_window)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            if self._3d_canvas is not None:
+                self._3d_canvas.draw_idle()
+            else:
+                self._show_static_3d()
             
         except Exception as e:
             import traceback
             error_msg = f"Error generating 3D model:\n{str(e)}\n\n{traceback.format_exc()}"
             messagebox.showerror("Error", error_msg)
-            viewer_window.destroy()
+            if viewer_window is not None:
+                viewer_window.destroy()
+                self._3d_window = None
 
 
 def main():
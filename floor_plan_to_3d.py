@@ -10,8 +10,108 @@ from mpl_toolkits.mplot3d import Axes3D
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 import argparse
 import os
+from functools import lru_cache
 from typing import List, Tuple, Optional
 
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:  # numba is optional; fall back to plain Python
+    _HAVE_NUMBA = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Vertex indices of the 6 faces of a wall box (Bottom, Top, Front, Back, Left, Right)
+_WALL_FACE_IDX = np.array([
+    [0, 1, 2, 3],
+    [4, 5, 6, 7],
+    [0, 1, 5, 4],
+    [2, 3, 7, 6],
+    [0, 3, 7, 4],
+    [1, 2, 6, 5],
+], dtype=np.int32)
+
+# Each wall box face split into two triangles
+_WALL_TRI_IDX = np.concatenate([_WALL_FACE_IDX[:, [0, 1, 2]],
+                                _WALL_FACE_IDX[:, [0, 2, 3]]], axis=1).reshape(-1, 3)
+
+
+
+@njit(cache=True, fastmath=True)
+def _wall_box_faces(x1, y1, x2, y2, height, thickness):
+    """
+    Build the 6 faces of a single wall box (JIT-compiled when numba is available)
+    
+    Returns:
+        (6, 4, 3) float32 array, or a (0, 4, 3) array for a zero-length wall
+    """
+    dx = x2 - x1
+    dy = y2 - y1
+    length = np.sqrt(dx * dx + dy * dy)
+    
+    if length == 0:
+        return np.empty((0, 4, 3), dtype=np.float32)
+    
+    # Perpendicular direction for thickness
+    perp_x = -dy / length * thickness / 2
+    perp_y = dx / length * thickness / 2
+    
+    # 8 vertices of the wall box: bottom face, then top face
+    vertices = np.empty((8, 3), dtype=np.float32)
+    for level in range(2):
+        z = height * level
+        base = 4 * level
+        vertices[base, 0] = x1 + perp_x
+        vertices[base, 1] = y1 + perp_y
+        vertices[base + 1, 0] = x2 + perp_x
+        vertices[base + 1, 1] = y2 + perp_y
+        vertices[base + 2, 0] = x2 - perp_x
+        vertices[base + 2, 1] = y2 - perp_y
+        vertices[base + 3, 0] = x1 - perp_x
+        vertices[base + 3, 1] = y1 - perp_y
+        for k in range(4):
+            vertices[base + k, 2] = z
+    
+    faces = np.empty((6, 4, 3), dtype=np.float32)
+    for f in range(6):
+        for k in range(4):
+            faces[f, k] = vertices[_WALL_FACE_IDX[f, k]]
+    
+    return faces
+
+
+# Compile at import so the first wall built by the UI doesn't pay for it
+_wall_box_faces(0.0, 0.0, 1.0, 0.0, 1.0, 0.1)
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _build_wall_faces(walls, height, thickness, face_idx, out):
+    """
+    Fill out with the selected faces of every wall box, walls split across threads
+    
+    Args:
+        walls: (N, 4) float32 array of non-degenerate wall segments
+        face_idx: Indices into the 6 box faces to emit for each wall
+        out: Preallocated (N * len(face_idx), 4, 3) float32 array
+    """
+    n_faces = face_idx.shape[0]
+    for i in prange(walls.shape[0]):
+        faces = _wall_box_faces(walls[i, 0], walls[i, 1], walls[i, 2], walls[i, 3], height, thickness)
+        for f in range(n_faces):
+            out[i * n_faces + f] = faces[face_idx[f]]
+
+
+@lru_cache(maxsize=4)
+def _load_and_detect(image_path: str, mtime: float):
+    """Load an image and detect its walls, cached per (path, mtime)"""
+    converter = FloorPlanTo3D()
+    image = converter.load_floor_plan(image_path)
+    return image, tuple(converter.detect_walls(image))
+
 
 class FloorPlanTo3D:
     """Converts floor plan images to 3D house models"""
@@ -36,17 +136,35 @@ class FloorPlanTo3D:
         if img is None:
             raise ValueError(f"Could not load image: {image_path}")
         
+        return self.load_floor_plan_from_array(img)
+    
+    def load_floor_plan_from_array(self, img: np.ndarray) -> np.ndarray:
+        """Preprocess an already decoded (BGR or grayscale) floor plan image"""
+        if img.ndim == 2:
+            return img
+        
         # Convert to grayscale
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         return gray
     
-    def detect_walls(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    def detect_walls(self, image: np.ndarray, max_dim: int = 1024) -> List[Tuple[int, int, int, int]]:
         """
         Detect walls in the floor plan using edge detection and line detection
         
+        Images larger than max_dim pixels are downsampled before detection and
+        the line endpoints scaled back up, trading sub-pixel accuracy (about
+        one downsampled pixel) for much less work on large scans.
+        
         Returns:
             List of wall segments as (x1, y1, x2, y2) tuples
         """
+        h, w = image.shape[:2]
+        k = max(h, w) / max_dim
+        if k > 1:
+            image = cv2.resize(image, (int(w / k), int(h / k)), interpolation=cv2.INTER_AREA)
+        else:
+            k = 1
+        
         # Apply threshold to get binary image
         _, binary = cv2.threshold(image, 127, 255, cv2.THRESH_BINARY_INV)
         
@@ -54,28 +172,56 @@ class FloorPlanTo3D:
         kernel = np.ones((3, 3), np.uint8)
         binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
         
-        # Edge detection
-        edges = cv2.Canny(binary, 50, 150)
+        # FastLineDetector (opencv-contrib) groups edge pixels by gradient direction in
+        # near-linear time and does its own edge detection; fall back to Canny + HoughLinesP
+        if hasattr(cv2, 'ximgproc'):
+            fld = cv2.ximgproc.createFastLineDetector(length_threshold=20, canny_th1=50, canny_th2=150)
+            lines = fld.detect(binary)
+        else:
+            # Edge detection
+            edges = cv2.Canny(binary, 50, 150)
+            
+            # Detect lines using HoughLinesP
+            lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, 
+                                   minLineLength=30, maxLineGap=10)
+        
+        if lines is None:
+            return []
         
-        # Detect lines using HoughLinesP
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, 
-                               minLineLength=30, maxLineGap=10)
+        # Filter out very short lines (lengths measured in the downsampled image)
+        lines = lines.reshape(-1, 4)
+        length = np.hypot(lines[:, 2] - lines[:, 0], lines[:, 3] - lines[:, 1])
+        # Back to full-resolution integer pixels (FastLineDetector returns float endpoints)
+        lines = np.rint(lines[length > 20] * k).astype(np.int32)
+        return [tuple(line) for line in lines.tolist()]
+    
+    def load_and_detect(self, image_path: str) -> Tuple[np.ndarray, List[Tuple[int, int, int, int]]]:
+        """
+        Load a floor plan and detect its walls, reusing the result while the file is unchanged
         
-        walls = []
-        if lines is not None:
-            for line in lines:
-                x1, y1, x2, y2 = line[0]
-                # Filter out very short lines
-                length = np.sqrt((x2-x1)**2 + (y2-y1)**2)
-                if length > 20:
-                    walls.append((x1, y1, x2, y2))
+        Wall detection does not depend on wall height or thickness, so repeated
+        renders of the same file with different settings skip the vision pipeline.
         
-        return walls
+        Returns:
+            Grayscale image and list of wall segments
+        """
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Floor plan image not found: {image_path}")
+        image, walls = _load_and_detect(os.path.abspath(image_path), os.path.getmtime(image_path))
+        return image, list(walls)
+    
+    def detect_walls_from_array(self, img: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Detect walls in an already decoded (BGR or grayscale) image, e.g. from cv2.imdecode"""
+        return self.detect_walls(self.load_floor_plan_from_array(img))
     
-    def detect_rooms(self, image: np.ndarray) -> List[np.ndarray]:
+    def detect_rooms(self, image: np.ndarray, min_area: float = 500) -> List[np.ndarray]:
         """
         Detect rooms/contours in the floor plan
         
+        Args:
+            image: Grayscale floor plan image
+            min_area: Minimum room area threshold in pixels
+        
         Returns:
             List of room contours
         """
@@ -86,20 +232,15 @@ class FloorPlanTo3D:
         contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         # Filter contours by area
-        rooms = []
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > 500:  # Minimum room area threshold
-                rooms.append(contour)
-        
-        return rooms
+        areas = np.fromiter(map(cv2.contourArea, contours), dtype=np.float32, count=len(contours))
+        return [contours[i] for i in np.flatnonzero(areas > min_area)]
     
-    def normalize_coordinates(self, walls: List[Tuple], image_shape: Tuple[int, int]) -> Tuple[List, float]:
+    def normalize_coordinates(self, walls: List[Tuple], image_shape: Tuple[int, int]) -> Tuple[np.ndarray, float]:
         """
         Normalize wall coordinates to real-world scale
         
         Returns:
-            Normalized walls and scale factor
+            (N, 4) float32 array of normalized walls and scale factor
         """
         # Estimate scale (assuming image represents a typical house ~10-20m)
         # Use image dimensions to estimate scale
@@ -107,16 +248,70 @@ class FloorPlanTo3D:
         estimated_house_width = 15.0  # meters
         scale = estimated_house_width / max(img_width, img_height)
         
-        normalized_walls = []
-        for x1, y1, x2, y2 in walls:
-            nx1 = x1 * scale
-            ny1 = y1 * scale
-            nx2 = x2 * scale
-            ny2 = y2 * scale
-            normalized_walls.append((nx1, ny1, nx2, ny2))
+        normalized_walls = np.asarray(walls, dtype=np.float32).reshape(-1, 4) * np.float32(scale)
         
         return normalized_walls, scale
     
+    def merge_walls(self, walls, tolerance: float) -> np.ndarray:
+        """
+        Merge collinear, overlapping or adjacent wall segments
+        
+        Segments are grouped by direction, then clustered by perpendicular
+        offset; within a cluster, segments less than `tolerance` apart along
+        the line are joined into one.
+        
+        Args:
+            walls: Sequence or (N, 4) array of (x1, y1, x2, y2) wall segments
+            tolerance: Maximum offset/gap (same units as walls) to merge across
+        
+        Returns:
+            (M, 4) float32 array of merged wall segments, M <= N
+        """
+        walls = np.asarray(walls, dtype=np.float32).reshape(-1, 4)
+        if len(walls) < 2 or tolerance <= 0:
+            return walls
+        
+        x1, y1, x2, y2 = walls.T
+        dx, dy = x2 - x1, y2 - y1
+        length = np.sqrt(dx**2 + dy**2)
+        
+        # Direction bucket in [0, pi); pi wraps around to 0
+        angle = np.round(np.arctan2(dy, dx) % np.pi, 2)
+        angle[angle >= np.round(np.pi, 2)] = 0
+        
+        merged = []
+        for a in np.unique(angle):
+            idx = np.flatnonzero(angle == a)
+            
+            # Unit direction of the longest segment in the group
+            ref = idx[np.argmax(length[idx])]
+            c, s = dx[ref] / length[ref], dy[ref] / length[ref]
+            
+            # Perpendicular offset and extent along the shared direction
+            offset = -x1[idx] * s + y1[idx] * c
+            t1 = x1[idx] * c + y1[idx] * s
+            t2 = x2[idx] * c + y2[idx] * s
+            start, end = np.minimum(t1, t2), np.maximum(t1, t2)
+            
+            # Cluster by offset, then join intervals within each cluster
+            order = np.argsort(offset)
+            clusters = np.split(order, np.flatnonzero(np.diff(offset[order]) > tolerance) + 1)
+            for cluster in clusters:
+                rho = offset[cluster].mean()
+                cluster = cluster[np.argsort(start[cluster])]
+                cur_start, cur_end = start[cluster[0]], end[cluster[0]]
+                for i in cluster[1:]:
+                    if start[i] <= cur_end + tolerance:
+                        cur_end = max(cur_end, end[i])
+                    else:
+                        merged.append((cur_start, cur_end, rho, c, s))
+                        cur_start, cur_end = start[i], end[i]
+                merged.append((cur_start, cur_end, rho, c, s))
+        
+        t_start, t_end, rho, c, s = np.array(merged, dtype=np.float32).T
+        return np.stack([t_start * c - rho * s, t_start * s + rho * c,
+                         t_end * c - rho * s, t_end * s + rho * c], axis=1)
+    
     def create_3d_wall(self, x1: float, y1: float, x2: float, y2: float, 
                        height: float, thickness: float) -> List[np.ndarray]:
         """
@@ -125,53 +320,123 @@ class FloorPlanTo3D:
         Returns:
             List of vertices for the wall faces
         """
-        # Calculate wall direction
+        return list(_wall_box_faces(float(x1), float(y1), float(x2), float(y2),
+                                    float(height), float(thickness)))
+    
+    def _wall_box_vertices(self, walls, height: float, thickness: float) -> np.ndarray:
+        """
+        Create the 8 box vertices of every non-degenerate wall segment
+        
+        Returns:
+            (M, 8, 3) float32 array, vertex order as in create_3d_wall
+        """
+        walls = np.asarray(walls, dtype=np.float32).reshape(-1, 4)
+        x1, y1, x2, y2 = walls.T
         dx = x2 - x1
         dy = y2 - y1
         length = np.sqrt(dx**2 + dy**2)
         
-        if length == 0:
-            return []
-        
-        # Normalize direction
-        dx_norm = dx / length
-        dy_norm = dy / length
+        # Skip zero-length walls, as create_3d_wall does
+        keep = length > 0
+        x1, y1, x2, y2 = x1[keep], y1[keep], x2[keep], y2[keep]
+        dx, dy, length = dx[keep], dy[keep], length[keep]
         
         # Perpendicular direction for thickness
-        perp_x = -dy_norm * thickness / 2
-        perp_y = dx_norm * thickness / 2
-        
-        # Create 8 vertices for the wall box
-        vertices = []
-        
-        # Bottom face vertices
-        vertices.append([x1 + perp_x, y1 + perp_y, 0])
-        vertices.append([x2 + perp_x, y2 + perp_y, 0])
-        vertices.append([x2 - perp_x, y2 - perp_y, 0])
-        vertices.append([x1 - perp_x, y1 - perp_y, 0])
-        
-        # Top face vertices
-        vertices.append([x1 + perp_x, y1 + perp_y, height])
-        vertices.append([x2 + perp_x, y2 + perp_y, height])
-        vertices.append([x2 - perp_x, y2 - perp_y, height])
-        vertices.append([x1 - perp_x, y1 - perp_y, height])
-        
-        # Define faces (6 faces of a box)
-        faces = [
-            [0, 1, 2, 3],  # Bottom
-            [4, 5, 6, 7],  # Top
-            [0, 1, 5, 4],  # Front
-            [2, 3, 7, 6],  # Back
-            [0, 3, 7, 4],  # Left
-            [1, 2, 6, 5],  # Right
-        ]
-        
-        wall_faces = []
-        for face in faces:
-            face_vertices = np.array([vertices[i] for i in face])
-            wall_faces.append(face_vertices)
-        
-        return wall_faces
+        perp_x = -dy / length * thickness / 2
+        perp_y = dx / length * thickness / 2
+        
+        verts = np.empty((len(x1), 8, 3), dtype=np.float32)
+        verts[:, [0, 4], 0] = (x1 + perp_x)[:, None]
+        verts[:, [0, 4], 1] = (y1 + perp_y)[:, None]
+        verts[:, [1, 5], 0] = (x2 + perp_x)[:, None]
+        verts[:, [1, 5], 1] = (y2 + perp_y)[:, None]
+        verts[:, [2, 6], 0] = (x2 - perp_x)[:, None]
+        verts[:, [2, 6], 1] = (y2 - perp_y)[:, None]
+        verts[:, [3, 7], 0] = (x1 - perp_x)[:, None]
+        verts[:, [3, 7], 1] = (y1 - perp_y)[:, None]
+        verts[:, :4, 2] = 0
+        verts[:, 4:, 2] = height
+        
+        return verts
+    
+    def create_3d_walls(self, walls, height: float, thickness: float, bottom: bool = True) -> np.ndarray:
+        """
+        Create 3D faces for all wall segments at once
+        
+        Vectorized equivalent of calling create_3d_wall for every wall; with
+        numba installed the walls are built in parallel instead.
+        
+        Args:
+            walls: Sequence or (N, 4) array of (x1, y1, x2, y2) wall segments
+            height: Wall height
+            thickness: Wall thickness
+            bottom: Include the bottom faces; renderers that only view the
+                model from above can skip them
+        
+        Returns:
+            (M*6, 4, 3) float32 array of wall faces (M*5 without bottoms), M
+            being the number of non-degenerate walls
+        """
+        face_idx = np.arange(6) if bottom else np.arange(1, 6)
+        if _HAVE_NUMBA:
+            walls = np.asarray(walls, dtype=np.float32).reshape(-1, 4)
+            walls = np.ascontiguousarray(walls[(walls[:, 2:] != walls[:, :2]).any(axis=1)])  # Skip zero-length walls
+            out = np.empty((len(walls) * len(face_idx), 4, 3), dtype=np.float32)
+            _build_wall_faces(walls, float(height), float(thickness), face_idx, out)
+            return out
+        
+        verts = self._wall_box_vertices(walls, height, thickness)
+        face_idx = _WALL_FACE_IDX[face_idx]
+        return np.ascontiguousarray(verts[:, face_idx].reshape(-1, 4, 3), dtype=np.float32)
+    
+    def create_3d_wall_lines(self, walls, height: float) -> np.ndarray:
+        """
+        Create a wireframe outline for all wall segments: a cheap stand-in
+        for create_3d_walls on very dense plans
+        
+        Each wall becomes its bottom and top center lines plus a vertical
+        edge at either end.
+        
+        Args:
+            walls: Sequence or (N, 4) array of (x1, y1, x2, y2) wall segments
+            height: Wall height
+        
+        Returns:
+            (N*4, 2, 3) float32 array of line segments
+        """
+        walls = np.asarray(walls, dtype=np.float32).reshape(-1, 4)
+        start, end = walls[:, :2], walls[:, 2:]
+        
+        segments = np.zeros((len(walls), 4, 2, 3), dtype=np.float32)
+        segments[:, 0, 0, :2] = start  # Bottom line
+        segments[:, 0, 1, :2] = end
+        segments[:, 1, 0, :2] = start  # Top line
+        segments[:, 1, 1, :2] = end
+        segments[:, 1, :, 2] = height
+        segments[:, 2, :, :2] = start[:, None]  # Vertical edge at the start
+        segments[:, 2, 1, 2] = height
+        segments[:, 3, :, :2] = end[:, None]  # Vertical edge at the end
+        segments[:, 3, 1, 2] = height
+        
+        return segments.reshape(-1, 2, 3)
+    
+    def create_3d_wall_mesh(self, walls, height: float, thickness: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Create a single triangle mesh for all wall segments
+        
+        Args:
+            walls: Sequence or (N, 4) array of (x1, y1, x2, y2) wall segments
+            height: Wall height
+            thickness: Wall thickness
+        
+        Returns:
+            (M*8, 3) float32 vertex array and (M*12, 3) triangle index array
+        """
+        verts = self._wall_box_vertices(walls, height, thickness)
+        offsets = 8 * np.arange(len(verts), dtype=np.int32)[:, None, None]
+        triangles = (_WALL_TRI_IDX[None, :, :] + offsets).reshape(-1, 3)
+        
+        return np.ascontiguousarray(verts.reshape(-1, 3), dtype=np.float32), triangles
     
     def create_3d_floor(self, image_shape: Tuple[int, int], scale: float) -> np.ndarray:
         """Create a floor plane"""
@@ -184,45 +449,78 @@ class FloorPlanTo3D:
             [width, 0, 0],
             [width, height, 0],
             [0, height, 0]
-        ])
+        ], dtype=np.float32)
         
         return floor_vertices
     
-    def generate_3d_model(self, image_path: str, output_path: Optional[str] = None) -> None:
+    def set_equal_limits(self, ax, vertex_arrays) -> None:
+        """
+        Give a 3D axes equal-length x, y and z ranges around the given geometry
+        
+        Bounds come straight from the vertex arrays, so matplotlib does not
+        have to autoscale over every collection first.
+        
+        Args:
+            ax: 3D axes to set limits on
+            vertex_arrays: Arrays of any shape whose last axis is (x, y, z)
+        """
+        verts = [np.reshape(v, (-1, 3)) for v in vertex_arrays if np.size(v)]
+        if not verts:
+            return
+        verts = np.concatenate(verts)
+        mins, maxs = verts.min(axis=0), verts.max(axis=0)
+        max_range = (maxs - mins).max()
+        mid_x, mid_y, mid_z = (mins + maxs) / 2
+        ax.set_xlim(mid_x - max_range/2, mid_x + max_range/2)
+        ax.set_ylim(mid_y - max_range/2, mid_y + max_range/2)
+        ax.set_zlim(mid_z - max_range/2, mid_z + max_range/2)
+    
+    def generate_3d_model(self, image_path: str, output_path: Optional[str] = None, ax=None):
         """
         Main method to generate 3D model from floor plan
         
         Args:
             image_path: Path to floor plan image
             output_path: Optional path to save 3D visualization
+            ax: Optional existing 3D axes to clear and draw into, e.g. to reuse
+                one figure across renders; the caller then takes care of showing it
+        
+        Returns:
+            The 3D axes the model was drawn on
         """
         print(f"Loading floor plan from: {image_path}")
-        image = self.load_floor_plan(image_path)
-        
         print("Detecting walls...")
-        walls = self.detect_walls(image)
+        image, walls = self.load_and_detect(image_path)
         print(f"Found {len(walls)} wall segments")
         
         print("Normalizing coordinates...")
         normalized_walls, scale = self.normalize_coordinates(walls, image.shape)
         
+        # Collapse collinear fragments before extrusion
+        normalized_walls = self.merge_walls(normalized_walls, self.wall_thickness)
+        print(f"Merged into {len(normalized_walls)} walls")
+        
         print("Creating 3D model...")
         # Create 3D visualization
-        fig = plt.figure(figsize=(16, 12))
-        ax = fig.add_subplot(111, projection='3d')
+        own_figure = ax is None
+        if own_figure:
+            fig = plt.figure(figsize=(16, 12))
+            ax = fig.add_subplot(111, projection='3d')
+        else:
+            fig = ax.figure
+            ax.clear()
         
-        # Create floor
+        # Create floor (3D collections are rasterized so vector outputs like PDF/SVG
+        # embed one image instead of a path per face; labels stay vector)
         floor = self.create_3d_floor(image.shape, scale)
-        floor_face = Poly3DCollection([floor], alpha=0.3, facecolor='gray', edgecolor='black')
+        floor_face = Poly3DCollection([floor], alpha=0.3, facecolor='gray', edgecolor='black', rasterized=True)
         ax.add_collection3d(floor_face)
         
-        # Create walls
-        for x1, y1, x2, y2 in normalized_walls:
-            wall_faces = self.create_3d_wall(x1, y1, x2, y2, self.wall_height, self.wall_thickness)
-            for face in wall_faces:
-                wall_poly = Poly3DCollection([face], alpha=0.7, facecolor='beige', 
-                                            edgecolor='brown', linewidths=0.5)
-                ax.add_collection3d(wall_poly)
+        # Create walls, all faces built in one batch and drawn as one collection
+        wall_faces = self.create_3d_walls(normalized_walls, self.wall_height, self.wall_thickness, bottom=False)
+        if len(wall_faces):
+            ax.add_collection3d(Poly3DCollection(wall_faces, alpha=0.7, facecolor='beige',
+                                                 edgecolor='brown', linewidths=0.5, rasterized=True))
         
         # Set axis properties
         ax.set_xlabel('X (meters)')
@@ -231,24 +529,17 @@ class FloorPlanTo3D:
         ax.set_title('3D House Model from Floor Plan')
         
         # Set equal aspect ratio
-        max_range = max([ax.get_xlim()[1] - ax.get_xlim()[0],
-                        ax.get_ylim()[1] - ax.get_ylim()[0],
-                        ax.get_zlim()[1] - ax.get_zlim()[0]])
-        mid_x = (ax.get_xlim()[0] + ax.get_xlim()[1]) / 2
-        mid_y = (ax.get_ylim()[0] + ax.get_ylim()[1]) / 2
-        mid_z = (ax.get_zlim()[0] + ax.get_zlim()[1]) / 2
-        ax.set_xlim(mid_x - max_range/2, mid_x + max_range/2)
-        ax.set_ylim(mid_y - max_range/2, mid_y + max_range/2)
-        ax.set_zlim(mid_z - max_range/2, mid_z + max_range/2)
+        self.set_equal_limits(ax, [floor, wall_faces])
         
         # Save or show
         if output_path:
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
+            fig.savefig(output_path, dpi=150, bbox_inches='tight')
             print(f"3D model saved to: {output_path}")
-        else:
+        elif own_figure:
             plt.show()
         
         print("3D model generation complete!")
+        return ax
 
 
 def main():
@@ -6,13 +6,19 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkinter import scrolledtext
 import os
+import io
+import base64
 import threading
-from floor_plan_to_3d import FloorPlanTo3D
-from PIL import Image, ImageTk
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+# matplotlib, PIL and floor_plan_to_3d (OpenCV) are imported where first used, so the window opens fast
+
+# Oldest status log lines are dropped beyond this many
+_MAX_LOG_LINES = 2000
+
+# Plans with more walls than this are drawn as a wireframe instead of solid faces
+_WIREFRAME_WALL_LIMIT = 500
 
 
 class FloorPlan3DApp:
@@ -25,8 +31,19 @@ class FloorPlan3DApp:
             
             self.floor_plan_path = None
             self.converter = None
+            self._q = queue.Queue()  # (kind, payload) messages for the main thread, drained by _pump
+            self._preview_cache = {}  # (path, mtime) -> preview thumbnail as base64 PNG
+            self._preview_key = None  # (path, mtime) of the preview that should be on screen
+            self._height_after_id = None  # Pending scale label updates
+            self._thickness_after_id = None
+            self._floor_cache = {}  # (image_shape, scale) -> floor vertices
+            self._executor = ThreadPoolExecutor(max_workers=1)  # One reusable generation worker
+            self._stages = [self._load_stage, self._detect_stage, self._normalize_stage]
+            self._generating = False  # A generation pipeline is running
+            self._cancel = False  # Stop the pipeline before its next stage
             
             self.setup_ui()
+            self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         except Exception as e:
             import traceback
             error_msg = f"Error initializing application:\n{str(e)}\n\n{traceback.format_exc()}"
@@ -149,7 +166,7 @@ class FloorPlan3DApp:
             font=('Arial', 9, 'bold')
         )
         self.height_label.pack(anchor=tk.W, padx=5)
-        height_scale.config(command=lambda v: self.height_label.config(text=f"{float(v):.1f} m"))
+        height_scale.config(command=self._on_height_scale)
         
         # Wall Thickness
         tk.Label(
@@ -179,7 +196,7 @@ class FloorPlan3DApp:
             font=('Arial', 9, 'bold')
         )
         self.thickness_label.pack(anchor=tk.W, padx=5)
-        thickness_scale.config(command=lambda v: self.thickness_label.config(text=f"{float(v):.2f} m"))
+        thickness_scale.config(command=self._on_thickness_scale)
         
         # Generate button
         btn_generate = tk.Button(
@@ -195,9 +212,26 @@ class FloorPlan3DApp:
             pady=15,
             state=tk.DISABLED
         )
-        btn_generate.pack(fill=tk.X, pady=10)
+        btn_generate.pack(fill=tk.X, pady=(10, 2))
         self.btn_generate = btn_generate
         
+        self.btn_cancel = tk.Button(
+            left_panel,
+            text="Cancel",
+            command=self.cancel_generation,
+            font=('Arial', 10),
+            relief=tk.RAISED,
+            cursor='hand2',
+            padx=10,
+            pady=2,
+            state=tk.DISABLED
+        )
+        self.btn_cancel.pack(fill=tk.X, pady=(0, 10))
+        
+        # Animates while a model is being generated
+        self.progress = ttk.Progressbar(left_panel, mode='indeterminate')
+        self.progress.pack(fill=tk.X, pady=(0, 10))
+        
         # Status
         status_frame = tk.LabelFrame(left_panel, text="ℹ️ Status", 
                                     font=('Arial', 12, 'bold'), bg='#f0f0f0')
@@ -208,10 +242,15 @@ class FloorPlan3DApp:
             height=8,
             bg='#ffffff',
             font=('Courier', 9),
-            wrap=tk.WORD
+            wrap=tk.WORD,
+            undo=False,
+            autoseparators=False,
+            maxundo=0,
+            state=tk.DISABLED  # Read-only; _write_log enables it around each batch
         )
         self.status_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.log("Ready. Select a floor plan to begin.")
+        self._pump()
         
         # Right panel - Preview and Result
         right_panel = tk.Frame(main_frame, bg='#f0f0f0')
@@ -246,13 +285,75 @@ class FloorPlan3DApp:
             fg='#666'
         )
         self.model_label.pack(expand=True)
+        
+        # One figure and off-screen canvas, created on first generation and reused after
+        self.fig = None
         self.model_canvas = None
         
+    def _on_height_scale(self, value):
+        """Update the wall height label once the slider pauses"""
+        if self._height_after_id:
+            self.root.after_cancel(self._height_after_id)
+        self._height_after_id = self.root.after(
+            30, lambda: self.height_label.config(text=f"{self.wall_height_var.get():.1f} m"))
+        
+    def _on_thickness_scale(self, value):
+        """Update the wall thickness label once the slider pauses"""
+        if self._thickness_after_id:
+            self.root.after_cancel(self._thickness_after_id)
+        self._thickness_after_id = self.root.after(
+            30, lambda: self.thickness_label.config(text=f"{self.wall_thickness_var.get():.2f} m"))
+        
     def log(self, message):
-        """Add message to status log"""
-        self.status_text.insert(tk.END, message + "\n")
+        """Add message to status log (safe from worker threads; lines are written in batches)"""
+        self._q.put(('log', message))
+        
+    def _pump(self):
+        """Handle queued messages from worker threads in the main thread, every 50 ms"""
+        messages = []
+        try:
+            while True:
+                try:
+                    kind, payload = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'log':
+                    messages.append(payload)
+                    continue
+                
+                # Keep log lines in order with the events between them
+                self._write_log(messages)
+                messages = []
+                try:
+                    if kind == 'preview':
+                        self._apply_preview(*payload)
+                    elif kind == 'stage':
+                        self._on_stage_done(*payload)
+                    elif kind == 'err':
+                        self._finish_generation()
+                        messagebox.showerror("Error", payload)
+                except Exception as e:
+                    # A failed handler must not stop the pump or leave Generate locked
+                    messages.append(f"❌ Error: {str(e)}")
+                    if kind != 'preview':
+                        self._finish_generation()
+            self._write_log(messages)
+        finally:
+            self.root.after(50, self._pump)
+        
+    def _write_log(self, messages):
+        """Write log messages with a single insert"""
+        if not messages:
+            return
+        self.status_text.configure(state=tk.NORMAL)
+        self.status_text.insert(tk.END, "\n".join(messages) + "\n")
+        
+        # Keep only the newest lines (the text always ends with an empty line after the last newline)
+        excess = int(self.status_text.index('end-1c').split('.')[0]) - 1 - _MAX_LOG_LINES
+        if excess > 0:
+            self.status_text.delete('1.0', f'{excess + 1}.0')
+        self.status_text.configure(state=tk.DISABLED)
         self.status_text.see(tk.END)
-        self.root.update_idletasks()
         
     def select_floor_plan(self):
         """Open file dialog to select floor plan"""
@@ -306,79 +407,157 @@ class FloorPlan3DApp:
             messagebox.showerror("Error", f"Failed to open editor:\n{str(e)}")
                 
     def load_preview(self, file_path):
-        """Load and display floor plan preview"""
+        """Load and display floor plan preview, reusing it while the file is unchanged"""
         try:
-            image = Image.open(file_path)
-            # Resize to fit preview
-            image.thumbnail((600, 600), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(image)
-            self.preview_label.config(image=photo, text="")
-            self.preview_label.image = photo
+            key = self._preview_key = (file_path, os.path.getmtime(file_path))
         except Exception as e:
             self.log(f"Error loading preview: {str(e)}")
+            return
+        
+        if key in self._preview_cache:
+            self._show_preview(key)
+            return
+        
+        # Decode off the UI thread; only the PhotoImage has to be made on it
+        self.preview_label.config(image="", text="Loading preview...")
+        self.preview_label.image = None
+        thread = threading.Thread(target=self._decode_preview, args=(key,))
+        thread.daemon = True
+        thread.start()
+        
+    def _decode_preview(self, key):
+        """Thread function for preview decoding - PIL work only, no Tk calls"""
+        try:
+            from PIL import Image
+            image = Image.open(key[0])
+            # JPEGs decode directly at a reduced scale; then resize to fit preview
+            image.draft('RGB', (600, 600))
+            image.thumbnail((600, 600), Image.Resampling.BILINEAR)
+            
+            # Tk decodes PNG itself, so the thumbnail only needs to exist as compact PNG bytes
+            buf = io.BytesIO()
+            image.save(buf, 'PNG', compress_level=1)
+            png = base64.b64encode(buf.getvalue())
+        except Exception as e:
+            self.log(f"Error loading preview: {str(e)}")
+            return
+        self._q.put(('preview', (key, png)))
+        
+    def _apply_preview(self, key, png):
+        """Cache a decoded preview in the main thread and show it if still current"""
+        self._preview_cache[key] = png
+        if key == self._preview_key:
+            self._show_preview(key)
+            
+    def _show_preview(self, key):
+        """Show a cached preview with a native Tk PhotoImage, without touching the file or PIL"""
+        photo = tk.PhotoImage(data=self._preview_cache[key])
+        self.preview_label.config(image=photo, text="")
+        self.preview_label.image = photo
             
     def generate_3d(self):
-        """Generate 3D model in a separate thread"""
+        """Generate 3D model as a pipeline of stages run on the worker thread"""
         if not self.floor_plan_path:
             messagebox.showwarning("Warning", "Please select a floor plan first!")
             return
+        if self._generating:
+            return  # A generation is already running
             
         # Disable button during generation
+        self._generating = True
+        self._cancel = False
         self.btn_generate.config(state=tk.DISABLED)
+        self.btn_cancel.config(state=tk.NORMAL)
+        self.progress.start(50)
         self.log("Starting 3D model generation...")
         
-        # Run in separate thread to avoid freezing UI
-        thread = threading.Thread(target=self._generate_3d_thread)
-        thread.daemon = True
-        thread.start()
-        
-    def _generate_3d_thread(self):
-        """Thread function for 3D generation - does computation only"""
+        # Tk variables are read here, in the main thread; each stage adds its results to the job
+        job = {
+            'path': self.floor_plan_path,
+            'wall_height': self.wall_height_var.get(),
+            'wall_thickness': self.wall_thickness_var.get()
+        }
+        self._executor.submit(self._run_stage, 0, job)
+        
+    def cancel_generation(self):
+        """Stop the running generation once its current stage finishes"""
+        if self._generating:
+            self._cancel = True
+            self.btn_cancel.config(state=tk.DISABLED)
+            self.log("Cancelling...")
+        
+    def _run_stage(self, index, job):
+        """Thread function: run one generation stage and report through the queue"""
         try:
-            wall_height = self.wall_height_var.get()
-            wall_thickness = self.wall_thickness_var.get()
-            
-            self.log(f"Wall height: {wall_height}m, Thickness: {wall_thickness}m")
-            
-            # Create converter
-            self.converter = FloorPlanTo3D(
-                wall_height=wall_height,
-                wall_thickness=wall_thickness
-            )
-            
-            # Load and process (heavy computation in background thread)
-            self.log("Loading floor plan...")
-            image = self.converter.load_floor_plan(self.floor_plan_path)
-            
-            self.log("Detecting walls...")
-            walls = self.converter.detect_walls(image)
-            self.log(f"Found {len(walls)} wall segments")
-            
-            self.log("Normalizing coordinates...")
-            normalized_walls, scale = self.converter.normalize_coordinates(walls, image.shape)
-            
-            # Store data for main thread to create visualization
-            self.log("Preparing 3D data...")
-            model_data = {
-                'normalized_walls': normalized_walls,
-                'scale': scale,
-                'image_shape': image.shape,
-                'wall_height': wall_height,
-                'wall_thickness': wall_thickness
-            }
-            
-            # Create visualization in main thread (matplotlib must be in main thread)
-            self.root.after(0, self._create_3d_visualization, model_data)
-            
-            self.log("✅ 3D model generation complete!")
-            
+            self._stages[index](job)
+            self._q.put(('stage', (index, job)))
         except Exception as e:
             self.log(f"❌ Error: {str(e)}")
             import traceback
             error_msg = f"Failed to generate 3D model:\n{str(e)}\n\n{traceback.format_exc()}"
-            self.root.after(0, lambda: messagebox.showerror("Error", error_msg))
-        finally:
-            self.root.after(0, lambda: self.btn_generate.config(state=tk.NORMAL))
+            self._q.put(('err', error_msg))
+            
+    def _on_stage_done(self, index, job):
+        """Start the next stage in the main thread, or finish, unless cancelled"""
+        if self._cancel:
+            self.log("Generation cancelled")
+            self._finish_generation()
+        elif index + 1 < len(self._stages):
+            self._executor.submit(self._run_stage, index + 1, job)
+        else:
+            # Create visualization in main thread (matplotlib must be in main thread)
+            self._create_3d_visualization(job)
+            self.log("✅ 3D model generation complete!")
+            self._finish_generation()
+            
+    def _on_close(self):
+        """Stop the generation worker before the window goes away"""
+        self._cancel = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+        
+    def _finish_generation(self):
+        """Reset the controls after a generation ends"""
+        self._generating = False
+        self.progress.stop()
+        self.btn_generate.config(state=tk.NORMAL)
+        self.btn_cancel.config(state=tk.DISABLED)
+        
+    def _load_stage(self, job):
+        """Generation stage: create the converter and load the floor plan"""
+        wall_height, wall_thickness = job['wall_height'], job['wall_thickness']
+        self.log(f"Wall height: {wall_height}m, Thickness: {wall_thickness}m")
+        
+        # Create converter
+        from floor_plan_to_3d import FloorPlanTo3D
+        self.converter = FloorPlanTo3D(
+            wall_height=wall_height,
+            wall_thickness=wall_thickness
+        )
+        
+        # Load and process (heavy computation in background thread)
+        self.log("Loading floor plan...")
+        image = self.converter.load_floor_plan(job['path'])
+        
+        # Huge scans are downsampled inside detect_walls, which caps the detection size
+        job['image'] = image
+        job['image_shape'] = image.shape
+        
+    def _detect_stage(self, job):
+        """Generation stage: detect wall segments"""
+        self.log("Detecting walls...")
+        job['walls'] = self.converter.detect_walls(job.pop('image'))
+        self.log(f"Found {len(job['walls'])} wall segments")
+        
+    def _normalize_stage(self, job):
+        """Generation stage: scale walls to meters and merge fragments"""
+        self.log("Normalizing coordinates...")
+        normalized_walls, job['scale'] = self.converter.normalize_coordinates(job.pop('walls'), job['image_shape'])
+        
+        # Collapse collinear fragments before extrusion
+        job['normalized_walls'] = self.converter.merge_walls(normalized_walls, job['wall_thickness'])
+        self.log(f"Merged into {len(job['normalized_walls'])} walls")
+        self.log("Preparing 3D data...")
     
     def _create_3d_visualization(self, model_data):
         """Create matplotlib visualization in main thread"""
@@ -389,23 +568,36 @@ class FloorPlan3DApp:
             wall_height = model_data['wall_height']
             wall_thickness = model_data['wall_thickness']
             
-            # Create matplotlib figure (MUST be in main thread)
-            fig = plt.figure(figsize=(10, 8))
-            ax = fig.add_subplot(111, projection='3d')
+            # Reuse the matplotlib figure (MUST be drawn in main thread)
+            if self.fig is None:
+                from matplotlib.figure import Figure
+                from matplotlib.backends.backend_agg import FigureCanvasAgg
+                self.fig = Figure(figsize=(10, 8))
+                self.model_canvas = FigureCanvasAgg(self.fig)
+            self.fig.clf()
+            ax = self.fig.add_subplot(111, projection='3d')
             
             # Create floor
-            floor = self.converter.create_3d_floor(image_shape, scale)
+            floor_key = (tuple(image_shape), round(scale, 6))
+            floor = self._floor_cache.get(floor_key)
+            if floor is None:
+                floor = self._floor_cache[floor_key] = self.converter.create_3d_floor(image_shape, scale)
             from mpl_toolkits.mplot3d.art3d import Poly3DCollection
             floor_face = Poly3DCollection([floor], alpha=0.3, facecolor='gray', edgecolor='black')
             ax.add_collection3d(floor_face)
             
-            # Create walls
-            for x1, y1, x2, y2 in normalized_walls:
-                wall_faces = self.converter.create_3d_wall(x1, y1, x2, y2, wall_height, wall_thickness)
-                for face in wall_faces:
-                    wall_poly = Poly3DCollection([face], alpha=0.7, facecolor='beige', 
-                                                edgecolor='brown', linewidths=0.5)
-                    ax.add_collection3d(wall_poly)
+            # Create walls, all faces built in one batch and drawn as one collection
+            if len(normalized_walls) > _WIREFRAME_WALL_LIMIT:
+                # Too many walls for solid faces: one line collection of wall outlines
+                from mpl_toolkits.mplot3d.art3d import Line3DCollection
+                wall_faces = self.converter.create_3d_wall_lines(normalized_walls, wall_height)
+                ax.add_collection3d(Line3DCollection(wall_faces, colors='brown', linewidths=0.5))
+                self.log(f"{len(normalized_walls)} walls: drawing a wireframe")
+            else:
+                wall_faces = self.converter.create_3d_walls(normalized_walls, wall_height, wall_thickness, bottom=False)
+                if len(wall_faces):
+                    ax.add_collection3d(Poly3DCollection(wall_faces, alpha=0.7, facecolor='beige',
+                                                         edgecolor='brown', linewidths=0.5))
             
             # Set axis properties
             ax.set_xlabel('X (meters)')
@@ -413,19 +605,11 @@ class FloorPlan3DApp:
             ax.set_zlabel('Z (meters)')
             ax.set_title('3D House Model from Floor Plan')
             
-            # Set equal aspect ratio
-            max_range = max([ax.get_xlim()[1] - ax.get_xlim()[0],
-                            ax.get_ylim()[1] - ax.get_ylim()[0],
-                            ax.get_zlim()[1] - ax.get_zlim()[0]])
-            mid_x = (ax.get_xlim()[0] + ax.get_xlim()[1]) / 2
-            mid_y = (ax.get_ylim()[0] + ax.get_ylim()[1]) / 2
-            mid_z = (ax.get_zlim()[0] + ax.get_zlim()[1]) / 2
-            ax.set_xlim(mid_x - max_range/2, mid_x + max_range/2)
-            ax.set_ylim(mid_y - max_range/2, mid_y + max_range/2)
-            ax.set_zlim(mid_z - max_range/2, mid_z + max_range/2)
+            # Set equal aspect ratio from the floor and wall vertices
+            self.converter.set_equal_limits(ax, [floor, wall_faces])
             
             # Display in UI
-            self._display_3d_model(fig)
+            self._display_3d_model()
             
         except Exception as e:
             import traceback
@@ -433,17 +617,16 @@ class FloorPlan3DApp:
             messagebox.showerror("Visualization Error", error_msg)
             self.log(f"❌ Visualization error: {str(e)}")
             
-    def _display_3d_model(self, fig):
-        """Display 3D model in the UI"""
-        # Clear previous canvas
-        if self.model_canvas:
-            self.model_canvas.get_tk_widget().destroy()
-            
-        # Create new canvas
-        self.model_canvas = FigureCanvasTkAgg(fig, self.model_frame)
-        self.model_canvas.draw()
-        self.model_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        self.model_label.pack_forget()
+    def _display_3d_model(self):
+        """Display 3D model in the UI as a static image rendered off-screen by Agg"""
+        from PIL import Image, ImageTk
+        
+        canvas = self.model_canvas
+        canvas.draw()
+        image = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+        photo = ImageTk.PhotoImage(image)
+        self.model_label.config(image=photo, text="")
+        self.model_label.image = photo  # Keep a reference so Tk doesn't lose the image
         
         # Switch to 3D Model tab
         self.notebook.select(1)  # Switch to the 3D Model tab (index 1)